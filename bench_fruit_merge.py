@@ -0,0 +1,225 @@
+"""Benchmarks for the Fruit Merge engine and renderer hot paths.
+
+Runs headless under SDL's dummy video driver.  Every scenario plays a
+number of runs from the same seeded board, and each measurement takes the
+best of several rounds of those runs:
+
+- engine: ticks/second of Engine.update, and per-call latency of update,
+  apply_gravity and check_merges
+- render: frames/second of a full frame (Game.update, draw and present,
+  one tick per frame), and per-call latency of each part, including the
+  Fruit.update pass over all sprites
+
+Results can be saved as a JSON baseline and later runs compared to it:
+
+    python bench_fruit_merge.py --save baseline.json
+    python bench_fruit_merge.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from fruit_engine import GRID_COLS, GRID_ROWS, Engine
+from fruit_merge import Game
+from fruit_profiler import Profiler
+
+ENGINE_PHASES = ("update", "apply_gravity", "check_merges")
+RENDER_PHASES = ("update", "sprites", "draw", "flip")
+
+def blank_engine(rows=GRID_ROWS, cols=GRID_COLS):
+    """A seeded engine with its first spawn taken off the board"""
+    engine = Engine(seed=1, rows=rows, cols=cols)
+    for col in range(cols):
+        if engine.board[col]:
+            engine._clear(col)
+    engine.dirty.clear()
+    return engine
+
+def empty_board():
+    """The classic 4x5 board right after a reset"""
+    return Engine(seed=1)
+
+def full_board():
+    """A 4x5 board packed below the top row with no pair to merge"""
+    engine = blank_engine()
+    for idx in range(engine.cols, len(engine.board)):
+        row, col = divmod(idx, engine.cols)
+        engine._place(idx, 1 + (row + col) % 2)
+    engine.check_merges()
+    return engine
+
+def merge_chains():
+    """An 8x6 board where every column merges all the way up to a durian.
+
+    Each column holds 4, 3, 2, 1 from the bottom with a 1 dropped on top,
+    so every tick one merge in each column makes the next one possible.
+    """
+    engine = blank_engine(rows=8, cols=6)
+    for col in range(engine.cols):
+        for height, value in enumerate((4, 3, 2, 1)):
+            engine._place((engine.rows - 1 - height) * engine.cols + col, value)
+        engine._place(col, 1)
+    engine.dirty.clear()
+    return engine
+
+def large_board():
+    """A 100x100 board two-thirds full of random fruits with gaps"""
+    engine = blank_engine(rows=100, cols=100)
+    rng = random.Random(1)
+    for idx in range(len(engine.board) // 3, len(engine.board)):
+        if not engine.board[idx] and rng.random() < 0.7:
+            engine._place(idx, rng.randint(1, 4))
+    return engine
+
+# name -> (board builder, ticks per run, runs per round)
+SCENARIOS = {
+    "empty": (empty_board, 2400, 4),
+    "full": (full_board, 480, 20),
+    "chains": (merge_chains, 12, 100),
+    "large": (large_board, 100, 1),
+}
+
+def latencies(profiler, phases):
+    """Return p50/p95 of each phase in milliseconds"""
+    result = {}
+    for phase in phases:
+        p50, p95 = profiler.percentiles(phase, (50, 95))
+        result[phase] = {"p50_ms": p50 * 1000, "p95_ms": p95 * 1000}
+    return result
+
+def bench_engine(build, ticks, runs, repeat):
+    """Best ticks/second over repeat rounds, then per-call latency"""
+    best = None
+    for _ in range(repeat):
+        engines = [build() for _ in range(runs)]
+        start = time.perf_counter()
+        for engine in engines:
+            for _ in range(ticks):
+                engine.update()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    profiler = Profiler(ENGINE_PHASES, size=ticks * runs * repeat)
+    for _ in range(repeat * runs):
+        engine = build()
+        engine.apply_gravity = profiler.wrap("apply_gravity", engine.apply_gravity)
+        engine.check_merges = profiler.wrap("check_merges", engine.check_merges)
+        update = profiler.wrap("update", engine.update)
+        for _ in range(ticks):
+            update()
+    return {"ticks_per_second": ticks * runs / best, "latency": latencies(profiler, ENGINE_PHASES)}
+
+def bench_render(build, frames, runs, repeat):
+    """Best frames/second of update + draw + present, with per-call latency"""
+    profiler = Profiler(RENDER_PHASES, size=frames * runs * repeat)
+    best = None
+    for _ in range(repeat):
+        games = [Game(engine=build(), profiler=profiler) for _ in range(runs)]
+        start = time.perf_counter()
+        for game in games:
+            # Every Game draws to the same display, so start from a full frame
+            game.renderer.invalidate()
+            for _ in range(frames):
+                game.update()
+                game.draw()
+                game.present()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"fps": frames * runs / best, "latency": latencies(profiler, RENDER_PHASES)}
+
+def run(scenarios=SCENARIOS, repeat=5, render=True):
+    """Run the benchmarks and return their results by scenario"""
+    results = {}
+    for name, (build, ticks, runs) in scenarios.items():
+        results[name] = {"engine": bench_engine(build, ticks, runs, repeat)}
+        if render:
+            results[name]["render"] = bench_render(build, ticks, runs, repeat)
+    pygame.quit()
+    return results
+
+def metrics(results):
+    """Flatten results into {name: (value, higher_is_better)}"""
+    flat = {}
+    for scenario, parts in results.items():
+        for part, data in parts.items():
+            for key in ("ticks_per_second", "fps"):
+                if key in data:
+                    flat[f"{scenario}.{part}.{key}"] = (data[key], True)
+            for phase, points in data["latency"].items():
+                flat[f"{scenario}.{part}.{phase}.p50_ms"] = (points["p50_ms"], False)
+    return flat
+
+def compare(results, baseline, tolerance, min_ms=0.001):
+    """Return (name, baseline, current, change) for metrics worse than tolerance.
+
+    Latencies that grew by less than min_ms are timer noise, not regressions.
+    """
+    current = metrics(results)
+    regressions = []
+    for name, (old, higher_is_better) in metrics(baseline).items():
+        if name not in current or not old:
+            continue
+        new = current[name][0]
+        change = (new - old) / old
+        if not higher_is_better and new - old < min_ms:
+            continue
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append((name, old, new, change))
+    return regressions
+
+def report(results):
+    lines = []
+    for scenario, parts in results.items():
+        engine = parts["engine"]
+        line = f"{scenario:<8}{engine['ticks_per_second']:>12.0f} ticks/s"
+        if "render" in parts:
+            line += f"{parts['render']['fps']:>10.0f} fps"
+        lines.append(line)
+        for part, data in parts.items():
+            for phase, points in data["latency"].items():
+                lines.append(f"  {part + '.' + phase:<22}{points['p50_ms']:8.3f}{points['p95_ms']:8.3f} ms")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fruit Merge engine and renderer")
+    parser.add_argument("scenarios", nargs="*",
+                        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per scenario; the best counts")
+    parser.add_argument("--no-render", action="store_true", help="only benchmark the engine")
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="flag regressions against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    scenarios = {name: SCENARIOS[name] for name in args.scenarios or SCENARIOS}
+    results = run(scenarios, args.repeat, not args.no_render)
+    print(f"{'p50 / p95':>42}")
+    print(report(results))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Benchmark ToDoList dengan ribuan sampai jutaan tugas.
+
+File tugas sintetis (1k sampai 10M tugas) dibuat sekali dan disimpan di
+--data-dir, lalu setiap kombinasi penyimpanan x ukuran dijalankan di
+proses baru dari salinan file itu:
+
+- waktu buka: ToDoList(...) yang memuat tugas dari disk, lalu load_tasks()
+- campuran operasi acak (add_task, complete_task, update_task,
+  delete_task, list_tasks, get_active_tasks) dengan p50/p95/p99 per
+  operasi; pesan dan daftar tugas dibuang, stdin tidak dibaca
+- byte yang ditulis ke disk per perubahan (dari /proc/self/io, Linux)
+- puncak RSS proses, dan bytes_per_task() bila store memilikinya
+
+Hasil bisa disimpan sebagai JSON dan dibandingkan dengan hasil lain:
+
+    python bench_todo.py --stores journal,columnar --sizes 10k,1M --save base.json
+    python bench_todo.py --stores journal,columnar --sizes 10k,1M --compare base.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows: puncak RSS tidak dilaporkan
+    resource = None
+
+from todo_columnar import ColumnarJournalStore
+from todo_storage import JournalStore, JsonStore, SqliteStore
+
+TODO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "to do list.py")
+WRITE_CHUNK = 10000  # Tugas per tulis saat membuat file sintetis
+WORDS = ("beli", "susu", "rapat", "kerja", "laporan", "olahraga", "masak", "cuci", "belajar",
+         "python", "bayar", "tagihan", "kirim", "email", "telepon", "ibu", "servis", "motor")
+DESCRIPTIONS = ("", "", "catatan singkat", "harus selesai sebelum rapat minggu depan")
+BASE_DATE = date(2026, 1, 1)
+
+# nama -> (pembuat store dari nama file, akhiran file data)
+STORES = {
+    "json": (JsonStore, ".json"),
+    "journal": (JournalStore, ".json"),
+    "columnar": (ColumnarJournalStore, ".json"),
+    "sqlite": (SqliteStore, ".db"),
+}
+
+MUTATIONS = ("add_task", "complete_task", "update_task", "delete_task")
+# nama -> bobot tiap operasi
+MIXES = {
+    "default": {"add_task": 25, "complete_task": 20, "update_task": 10, "delete_task": 5,
+                "list_tasks": 35, "get_active_tasks": 5},
+    "read": {"add_task": 5, "complete_task": 5, "update_task": 5, "delete_task": 0,
+             "list_tasks": 70, "get_active_tasks": 15},
+    "write": {"add_task": 50, "complete_task": 25, "update_task": 15, "delete_task": 10,
+              "list_tasks": 0, "get_active_tasks": 0},
+}
+
+def load_todo():
+    """Muat modul "to do list.py", yang namanya tidak bisa di-import biasa"""
+    spec = importlib.util.spec_from_file_location("todo_list", TODO_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def parse_size(text):
+    """"10k" -> 10000, "2M" -> 2000000"""
+    text = text.strip()
+    factor = {"k": 1000, "m": 1000000}.get(text[-1:].lower(), 1)
+    try:
+        return int(float(text[:-1] if factor > 1 else text) * factor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ukuran tidak valid: {text!r}")
+
+def size_name(count):
+    for suffix, factor in (("M", 1000000), ("k", 1000)):
+        if count >= factor and count % factor == 0:
+            return f"{count // factor}{suffix}"
+    return str(count)
+
+def random_task(rng, task_id):
+    """Tugas acak yang mirip tugas buatan add_task"""
+    due = "" if rng.random() < 0.4 else (BASE_DATE + timedelta(days=rng.randint(-60, 120))).isoformat()
+    created = datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 365 * 86400))
+    return {
+        "id": task_id,
+        "title": " ".join(rng.choices(WORDS, k=rng.randint(1, 4))),
+        "description": rng.choice(DESCRIPTIONS),
+        "due_date": due,
+        "completed": rng.random() < 0.3,
+        "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def synthesize(filename, count, seed=1):
+    """Tulis snapshot tasks.json berisi count tugas, bertahap per WRITE_CHUNK"""
+    rng = random.Random(seed)
+    tmp = filename + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f'{{"seq": 0, "next_id": {count + 1}, "tasks": [')
+        for start in range(1, count + 1, WRITE_CHUNK):
+            end = min(start + WRITE_CHUNK, count + 1)
+            if start > 1:
+                f.write(", ")
+            f.write(", ".join(json.dumps(random_task(rng, task_id), ensure_ascii=False)
+                              for task_id in range(start, end)))
+        f.write("]}")
+    os.replace(tmp, filename)
+
+def data_file(data_dir, store, count, seed):
+    """File data untuk store dengan count tugas; dibuat bila belum ada"""
+    os.makedirs(data_dir, exist_ok=True)
+    base = os.path.join(data_dir, f"tasks-{size_name(count)}-{seed}")
+    if not os.path.exists(base + ".json"):
+        synthesize(base + ".json", count, seed)
+    if STORES[store][1] == ".db" and not os.path.exists(base + ".db"):
+        sqlite = SqliteStore(base + ".db.tmp", import_from=base + ".json")
+        sqlite.load()
+        sqlite.close()
+        os.replace(base + ".db.tmp", base + ".db")
+    return base + STORES[store][1]
+
+class _Discard:
+    """stdout pengganti yang membuang semua tulisan tanpa system call"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+class _WriteCounter:
+    """Byte yang sudah ditulis proses ini (wchar di /proc/self/io), atau None"""
+
+    def __init__(self):
+        try:
+            self.f = open("/proc/self/io", "rb")
+        except OSError:
+            self.f = None
+
+    def __call__(self):
+        if self.f is None:
+            return None
+        self.f.seek(0)
+        for line in self.f.read().splitlines():
+            if line.startswith(b"wchar:"):
+                return int(line.split()[1])
+        return None
+
+def peak_rss():
+    """Puncak RSS proses ini dalam byte, atau None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def percentiles(samples):
+    """p50/p95/p99/max dalam milidetik dari durasi dalam nanodetik"""
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] / 1e6
+    return {"count": len(samples), "p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99),
+            "max_ms": samples[-1] / 1e6}
+
+def run_one(store, count, mix, ops, seed, data_dir):
+    """Satu benchmark di proses ini: buka, jalankan campuran operasi, tutup"""
+    source = data_file(data_dir, store, count, seed)
+    todo_module = load_todo()
+    work = tempfile.mkdtemp(prefix="bench_todo-")
+    filename = os.path.join(work, "tasks" + STORES[store][1])
+    shutil.copyfile(source, filename)
+    written = _WriteCounter()
+    rng = random.Random(seed)
+    result = {"store": store, "size": count, "mix": mix, "ops": ops}
+    try:
+        with redirect_stdout(_Discard()):
+            start = time.perf_counter()
+            todo = todo_module.ToDoList(filename, store=STORES[store][0](filename))
+            result["open_s"] = time.perf_counter() - start
+            start = time.perf_counter()
+            todo.load_tasks()
+            result["load_tasks_s"] = time.perf_counter() - start
+            todo.silent = True
+            if hasattr(todo.store, "bytes_per_task"):
+                result["bytes_per_task"] = todo.store.bytes_per_task()
+
+            max_id = count
+            operations = {
+                "add_task": lambda: todo.add_task(" ".join(rng.choices(WORDS, k=3)), rng.choice(DESCRIPTIONS),
+                                                  random_task(rng, 0)["due_date"]),
+                "complete_task": lambda: todo.complete_task(rng.randint(1, max_id)),
+                "update_task": lambda: todo.update_task(rng.randint(1, max_id), title=" ".join(rng.choices(WORDS, k=2))),
+                "delete_task": lambda: todo.delete_task(rng.randint(1, max_id)),
+                "list_tasks": lambda: todo.list_tasks(page=rng.randint(1, 5), filter=rng.choice((None, "active"))),
+                "get_active_tasks": lambda: todo.get_active_tasks(),
+            }
+            names = [name for name, weight in MIXES[mix].items() if weight]
+            schedule = rng.choices(names, [MIXES[mix][name] for name in names], k=ops)
+            samples = {name: [] for name in names}
+            bytes_by_op = dict.fromkeys(MUTATIONS, 0)
+            before_all = written()
+            start = time.perf_counter()
+            for name in schedule:
+                before = written()
+                began = time.perf_counter_ns()
+                operations[name]()
+                samples[name].append(time.perf_counter_ns() - began)
+                if name == "add_task":
+                    max_id += 1
+                if name in MUTATIONS and before is not None:
+                    bytes_by_op[name] += written() - before
+            result["ops_per_second"] = ops / (time.perf_counter() - start) if ops else None
+            after_all = written()
+            start = time.perf_counter()
+            todo.close()
+            result["close_s"] = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    mutations = sum(len(samples.get(name, ())) for name in MUTATIONS)
+    result["latency"] = {name: percentiles(points) for name, points in samples.items()}
+    if before_all is not None:
+        total = after_all - before_all
+        result["bytes_written"] = {
+            "total": total,
+            "per_mutation": total / mutations if mutations else None,
+            "by_op": {name: bytes_by_op[name] / len(samples[name])
+                      for name in MUTATIONS if samples.get(name)},
+        }
+    result["peak_rss"] = peak_rss()
+    return result
+
+def run(stores, sizes, mix="default", ops=2000, seed=1, data_dir=None):
+    """Jalankan setiap store x ukuran di proses sendiri; kembalikan hasilnya"""
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), "bench_todo_data")
+    runs = []
+    for count in sizes:
+        for store in stores:
+            # Proses baru per benchmark, agar puncak RSS tidak tercampur
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                runs.append(pool.submit(run_one, store, count, mix, ops, seed, data_dir).result())
+    return {"python": sys.version.split()[0], "platform": sys.platform, "runs": runs}
+
+def metrics(results):
+    """Ratakan hasil menjadi {nama: nilai}; semuanya lebih kecil lebih baik"""
+    flat = {}
+    for run in results["runs"]:
+        key = f"{run['store']}.{size_name(run['size'])}.{run['mix']}"
+        flat[f"{key}.open_s"] = run["open_s"]
+        for name, points in run["latency"].items():
+            if points:
+                flat[f"{key}.{name}.p50_ms"] = points["p50_ms"]
+        if run.get("bytes_written", {}).get("per_mutation") is not None:
+            flat[f"{key}.bytes_per_mutation"] = run["bytes_written"]["per_mutation"]
+        if run.get("peak_rss") is not None:
+            flat[f"{key}.peak_rss"] = run["peak_rss"]
+    return flat
+
+def compare(results, baseline, tolerance, min_ms=0.01):
+    """(nama, dulu, sekarang, perubahan) untuk metrik yang memburuk melebihi tolerance.
+
+    Latensi yang naik kurang dari min_ms dianggap derau pengukuran.
+    """
+    current = metrics(results)
+    regressions = []
+    for name, old in metrics(baseline).items():
+        if name not in current or not old:
+            continue
+        new = current[name]
+        if name.endswith("_ms") and new - old < min_ms:
+            continue
+        change = (new - old) / old
+        if change > tolerance:
+            regressions.append((name, old, new, change))
+    return regressions
+
+def _number(value, width, scale=1):
+    return f"{'-':>{width}}" if value is None else f"{value / scale:>{width}.0f}"
+
+def report(results):
+    lines = [f"{'store':<10}{'tugas':>7}{'buka':>9}{'load':>9}{'op/s':>9}{'B/ubah':>9}"
+             f"{'B/tugas':>9}{'RSS MB':>8}"]
+    for run in results["runs"]:
+        per_mutation = run.get("bytes_written", {}).get("per_mutation")
+        lines.append(f"{run['store']:<10}{size_name(run['size']):>7}{run['open_s']:>8.2f}s"
+                     f"{run['load_tasks_s']:>8.2f}s{_number(run['ops_per_second'], 9)}"
+                     f"{_number(per_mutation, 9)}{_number(run.get('bytes_per_task'), 9)}"
+                     f"{_number(run['peak_rss'], 8, 2**20)}")
+        for name, points in run["latency"].items():
+            if points:
+                lines.append(f"  {name:<18}{points['p50_ms']:9.3f}{points['p95_ms']:9.3f}"
+                             f"{points['p99_ms']:9.3f} ms (p50/p95/p99, {points['count']}x)")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ToDoList dengan banyak tugas")
+    parser.add_argument("--stores", default="journal,columnar,sqlite",
+                        help=f"penyimpanan, dipisah koma: {', '.join(STORES)} "
+                             "(json menulis ulang seluruh file per perubahan, jadi lambat di atas 10k)")
+    parser.add_argument("--sizes", default="1k,10k,100k",
+                        help="jumlah tugas, dipisah koma, misalnya 1k,100k,10M")
+    parser.add_argument("--mix", choices=MIXES, default="default", help="campuran operasi")
+    parser.add_argument("--ops", type=int, default=2000, help="jumlah operasi per benchmark")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", help="tempat file tugas sintetis (default: di direktori temp)")
+    parser.add_argument("--save", metavar="FILE", help="tulis hasil sebagai JSON")
+    parser.add_argument("--compare", metavar="FILE", help="laporkan kemunduran dibanding hasil JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="kenaikan relatif yang dilaporkan sebagai kemunduran")
+    args = parser.parse_args()
+    stores = [name.strip() for name in args.stores.split(",") if name.strip()]
+    for name in stores:
+        if name not in STORES:
+            parser.error(f"penyimpanan tidak dikenal {name!r}")
+    try:
+        sizes = [parse_size(text) for text in args.sizes.split(",") if text.strip()]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    results = run(stores, sizes, args.mix, args.ops, args.seed, args.data_dir)
+    print(report(results))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"KEMUNDURAN {name}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"Tidak ada kemunduran lebih dari {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Vectorized batch simulator for Fruit Merge.
+
+Holds N boards in one NumPy array of shape (N, rows, cols) and
+applies spawn, moves, gravity, merges and game-over detection to all of
+them at once per tick, following the same rules as fruit_engine.Engine.
+Meant for statistics over very many games, e.g. spawn-weight tuning:
+
+    python fruit_batch.py --games 100000 --weights 50,30,15,4,1
+    python fruit_batch.py --verify
+"""
+import argparse
+import bisect
+import itertools
+
+import numpy as np
+
+from fruit_engine import EMPTY, GRID_COLS, GRID_ROWS, MAX_LEVEL, SPAWN_INTERVAL, SPAWN_WEIGHTS, Engine
+
+class BatchEngine:
+    """N independent games advanced in lockstep.
+
+    Moves are random clicks: each tick every live board clicks a uniformly
+    chosen cell with probability move_rate.  With record=True every random
+    draw is kept so each board can be replayed through the scalar Engine.
+    """
+
+    def __init__(self, n, seed=None, weights=SPAWN_WEIGHTS, move_rate=0.0, record=False,
+                 rows=GRID_ROWS, cols=GRID_COLS):
+        self.n = n
+        self.rows = rows
+        self.cols = cols
+        self.rng = np.random.default_rng(seed)
+        self.weights = list(weights)
+        self.cum_weights = np.cumsum(self.weights)
+        self.move_rate = move_rate
+        self.record = record
+        self.reset()
+
+    def reset(self):
+        """Start N new games"""
+        self.boards = np.zeros((self.n, self.rows, self.cols), dtype=np.uint8)
+        self.score = np.zeros(self.n, dtype=np.int64)
+        self.game_over = np.zeros(self.n, dtype=bool)
+        self.length = np.zeros(self.n, dtype=np.int64)  # Ticks played
+        self.next_fruit_timer = 0
+        self.ticks = 0
+        self.changed = np.zeros(self.n, dtype=bool)  # Boards touched this tick
+        self.spawn_draws = []  # (u_col, u_type) arrays per spawn, if recording
+        self.move_draws = []   # (tick, clicked, rows, cols) per tick, if recording
+        self.spawn_fruit()
+
+    def spawn_fruit(self):
+        """Spawn a random fruit at the top of every live board"""
+        u_col = self.rng.random(self.n)
+        u_type = self.rng.random(self.n)
+        if self.record:
+            self.spawn_draws.append((u_col, u_type))
+
+        alive = ~self.game_over
+        top = self.boards[:, 0, :]
+        empty = top == EMPTY
+        count = empty.sum(axis=1)
+        self.game_over |= alive & (count == 0)
+        spawning = np.flatnonzero(alive & (count > 0))
+        if spawning.size == 0:
+            return
+
+        # Same mapping as random.choice / random.choices on the scalar side
+        pick = np.minimum((u_col[spawning] * count[spawning]).astype(np.int64), count[spawning] - 1)
+        ranks = np.cumsum(empty[spawning], axis=1) - 1
+        col = np.argmax(empty[spawning] & (ranks == pick[:, None]), axis=1)
+        kind = np.searchsorted(self.cum_weights, u_type[spawning] * self.cum_weights[-1], side="right")
+        self.boards[spawning, 0, col] = kind + 1
+        self.changed[spawning] = True
+
+    def try_move_fruits(self):
+        """Click a random cell on some live boards, like Engine.try_move_fruit"""
+        clicked = self.rng.random(self.n) < self.move_rate
+        rows = self.rng.integers(0, self.rows, self.n)
+        cols = self.rng.integers(0, self.cols, self.n)
+        if self.record:
+            self.move_draws.append((self.ticks, clicked, rows, cols))
+
+        b = np.flatnonzero(clicked & ~self.game_over)
+        r, c = rows[b], cols[b]
+        value = self.boards[b, r, c]
+        occupied = value != EMPTY
+        b, r, c, value = b[occupied], r[occupied], c[occupied], value[occupied]
+
+        # Try to move down: first empty cell anywhere below
+        column = self.boards[b, :, c]
+        below = (column == EMPTY) & (np.arange(self.rows)[None, :] > r[:, None])
+        down = below.any(axis=1)
+        target = np.argmax(below, axis=1)
+        self.boards[b[down], r[down], c[down]] = EMPTY
+        self.boards[b[down], target[down], c[down]] = value[down]
+        self.changed[b[down]] = True
+        b, r, c, value = b[~down], r[~down], c[~down], value[~down]
+
+        # Otherwise try left, then right, on the same row
+        for dc in (-1, 1):
+            nc = c + dc
+            inside = (nc >= 0) & (nc < self.cols)
+            ok = np.zeros(b.size, dtype=bool)
+            ok[inside] = self.boards[b[inside], r[inside], nc[inside]] == EMPTY
+            self.boards[b[ok], r[ok], c[ok]] = EMPTY
+            self.boards[b[ok], r[ok], nc[ok]] = value[ok]
+            self.changed[b[ok]] = True
+            b, r, c, value = b[~ok], r[~ok], c[~ok], value[~ok]
+
+    def apply_gravity(self):
+        """Make fruits on every live board fall down one row"""
+        boards = self.boards
+        alive = ~self.game_over[:, None]
+        for row in range(self.rows - 2, -1, -1):
+            falling = (boards[:, row, :] != EMPTY) & (boards[:, row + 1, :] == EMPTY) & alive
+            boards[:, row + 1, :] = np.where(falling, boards[:, row, :], boards[:, row + 1, :])
+            boards[:, row, :] = np.where(falling, EMPTY, boards[:, row, :])
+            self.changed |= falling.any(axis=1)
+
+    def check_merges(self):
+        """Merge pairs until no changed board has one, one merge per board per round.
+
+        Boards untouched since their last merge pass cannot have a pair.
+        """
+        flat = self.boards.reshape(self.n, -1)
+        active = np.flatnonzero(self.changed & ~self.game_over)
+        offsets = np.array([1, self.cols, -1, -self.cols])
+        while active.size:
+            v = self.boards[active]
+            can = (v != EMPTY) & (v != MAX_LEVEL)
+            pairs = np.zeros((4,) + v.shape, dtype=bool)  # right, down, left, up
+            pairs[0, :, :, :-1] = can[:, :, :-1] & (v[:, :, :-1] == v[:, :, 1:])
+            pairs[1, :, :-1, :] = can[:, :-1, :] & (v[:, :-1, :] == v[:, 1:, :])
+            pairs[2, :, :, 1:] = can[:, :, 1:] & (v[:, :, 1:] == v[:, :, :-1])
+            pairs[3, :, 1:, :] = can[:, 1:, :] & (v[:, 1:, :] == v[:, :-1, :])
+            pairs = pairs.reshape(4, active.size, -1)
+            anywhere = pairs.any(axis=0)
+            found = anywhere.any(axis=1)
+            active, pairs, anywhere = active[found], pairs[:, found], anywhere[found]
+            if active.size == 0:
+                break
+
+            # First cell in scan order, then first direction in neighbour order
+            anchor = np.argmax(anywhere, axis=1)
+            direction = np.argmax(pairs[:, np.arange(active.size), anchor], axis=0)
+            partner = anchor + offsets[direction]
+            new_value = flat[active, anchor] + 1
+            flat[active, partner] = EMPTY
+            flat[active, anchor] = new_value
+            self.score[active] += new_value.astype(np.int64) * 10
+
+    def check_game_over(self):
+        """Mark live boards whose top row is full as over"""
+        full = (self.boards[:, 0, :] != EMPTY).all(axis=1)
+        self.game_over |= full
+
+    def update(self):
+        """Advance every live board by one tick"""
+        if self.move_rate:
+            self.try_move_fruits()
+
+        self.length[~self.game_over] += 1
+        self.ticks += 1
+        self.next_fruit_timer += 1
+        if self.next_fruit_timer >= SPAWN_INTERVAL:
+            self.spawn_fruit()
+            self.next_fruit_timer = 0
+
+        self.apply_gravity()
+        self.check_merges()
+        self.check_game_over()
+        self.changed[:] = False
+
+    def run(self, max_ticks):
+        """Play until every game is over or max_ticks have passed"""
+        while self.ticks < max_ticks and not self.game_over.all():
+            self.update()
+        return self.results()
+
+    def results(self):
+        """Return per-game score and length plus their distributions"""
+        return {
+            "score": self.score.copy(),
+            "length": self.length.copy(),
+            "game_over": self.game_over.copy(),
+            "score_stats": summarize(self.score),
+            "length_stats": summarize(self.length),
+        }
+
+def summarize(values):
+    """Return mean, standard deviation and percentiles of an array"""
+    p = np.percentile(values, [0, 5, 25, 50, 75, 95, 100])
+    return {
+        "mean": float(np.mean(values)),
+        "std": float(np.std(values)),
+        "min": float(p[0]), "p5": float(p[1]), "p25": float(p[2]), "p50": float(p[3]),
+        "p75": float(p[4]), "p95": float(p[5]), "max": float(p[6]),
+    }
+
+class ReplayRng:
+    """Feeds recorded uniform draws to Engine in place of the random module"""
+
+    def __init__(self, draws):
+        self.draws = iter(draws)
+
+    def choice(self, seq):
+        u = next(self.draws)
+        return seq[min(int(u * len(seq)), len(seq) - 1)]
+
+    def choices(self, population, weights, k=1):
+        cum_weights = list(itertools.accumulate(weights))
+        u = next(self.draws)
+        return [population[bisect.bisect(cum_weights, u * cum_weights[-1])]]
+
+def verify(games=200, max_ticks=5000, seed=0, move_rate=0.05, weights=SPAWN_WEIGHTS,
+           rows=GRID_ROWS, cols=GRID_COLS):
+    """Replay a seeded batch through the scalar Engine and compare every board.
+
+    Raises AssertionError on the first disagreement.
+    """
+    batch = BatchEngine(games, seed=seed, weights=weights, move_rate=move_rate, record=True,
+                        rows=rows, cols=cols)
+    batch.run(max_ticks)
+    for i in range(games):
+        draws = [float(u[i]) for pair in batch.spawn_draws for u in pair]
+        engine = Engine(rng=ReplayRng(draws), weights=weights, rows=rows, cols=cols)
+        moves = {tick: (int(rows[i]), int(cols[i]))
+                 for tick, clicked, rows, cols in batch.move_draws if clicked[i]}
+        length = 0
+        for tick in range(batch.ticks):
+            if engine.game_over:
+                break
+            engine.step(moves.get(tick))
+            length += 1
+        assert engine.score == batch.score[i], (i, engine.score, batch.score[i])
+        assert engine.game_over == batch.game_over[i], (i, engine.game_over)
+        assert length == batch.length[i], (i, length, batch.length[i])
+        assert bytes(engine.board) == batch.boards[i].tobytes(), (i, engine.board, batch.boards[i])
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many Fruit Merge games at once")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=20000, help="maximum ticks per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=GRID_ROWS)
+    parser.add_argument("--cols", type=int, default=GRID_COLS)
+    parser.add_argument("--weights", default=",".join(map(str, SPAWN_WEIGHTS)))
+    parser.add_argument("--move-rate", type=float, default=0.0, help="chance of a random click per tick")
+    parser.add_argument("--verify", action="store_true", help="check against the scalar engine")
+    args = parser.parse_args()
+
+    weights = [int(w) for w in args.weights.split(",")]
+    if args.verify:
+        verify(seed=args.seed, weights=weights, move_rate=args.move_rate or 0.05,
+               rows=args.rows, cols=args.cols)
+        print("Batch engine agrees with the scalar engine")
+        return
+
+    batch = BatchEngine(args.games, seed=args.seed, weights=weights, move_rate=args.move_rate,
+                        rows=args.rows, cols=args.cols)
+    results = batch.run(args.ticks)
+    print(f"Games: {args.games}, finished: {int(results['game_over'].sum())}, ticks: {batch.ticks}")
+    for name in ("score", "length"):
+        stats = results[name + "_stats"]
+        print(f"{name:>6}: " + "  ".join(f"{key}={value:.1f}" for key, value in stats.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Expectimax auto-player for Fruit Merge.
+
+Each turn (once a spawned fruit has settled) the bot picks the click that
+maximizes expected score over the spawn distribution of
+Engine.spawn_fruit: max nodes try every useful click, chance nodes every
+open column and fruit type weighted like the real spawn.  Searches deepen
+iteratively until the per-move time budget runs out; positions are cached
+in a bounded LRU transposition table keyed by the engine's Zobrist hash.
+
+Play headless games to benchmark the bot or the engine:
+
+    python fruit_bot.py --games 20 --time 20
+"""
+import argparse
+import time
+from collections import OrderedDict
+
+from fruit_engine import SPAWN_INTERVAL, SPAWN_TYPES, Engine
+
+LOSS = -10000.0  # Value of a lost position
+CHECK_INTERVAL = 16  # Positions expanded between clock checks
+
+class _Timeout(Exception):
+    pass
+
+class Bot:
+    """Chooses moves for an Engine; see choose()"""
+
+    def __init__(self, time_budget=0.05, max_depth=4, table_size=200000):
+        self.time_budget = time_budget  # Seconds per move
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = OrderedDict()  # (key, depth, chance) -> value, in LRU order
+        self.nodes = 0
+        self.countdown = CHECK_INTERVAL  # Positions left until the next clock check
+        self.lookups = 0
+        self.hits = 0
+        self.search_time = 0.0
+        self.depths = []
+
+    def stats(self):
+        """Return search counters: nodes/second, cache hit rate and depth"""
+        return {
+            "moves": len(self.depths),
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes / self.search_time if self.search_time else 0.0,
+            "cache_hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "cache_size": len(self.table),
+            "mean_depth": sum(self.depths) / len(self.depths) if self.depths else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"Bot: {stats['moves']} moves, {stats['nodes']} nodes, "
+                f"{stats['nodes_per_second']:.0f} nodes/s, "
+                f"cache hit rate {stats['cache_hit_rate']:.1%}, mean depth {stats['mean_depth']:.1f}")
+
+    def choose(self, engine):
+        """Return the best (row, col) click for a settled engine, or None to wait"""
+        start = time.perf_counter()
+        self.deadline = start + self.time_budget
+        self.countdown = CHECK_INTERVAL
+        root = engine.copy()
+        root.settle()
+        moves = self._moves(root, timed=False)  # Always finished, so there is a move to return
+        best = None
+        depth_done = 0
+        try:
+            for depth in range(1, self.max_depth + 1):
+                values = {}
+                # Search the previous best first so a cut-off iteration still counts
+                for action, child, reward in moves:
+                    if values and time.perf_counter() > self.deadline:
+                        raise _Timeout
+                    values[action] = reward + self._chance(child, depth)
+                moves.sort(key=lambda move: values[move[0]], reverse=True)
+                best = moves[0][0]
+                depth_done = depth
+        except _Timeout:
+            if values and moves[0][0] in values:
+                best = max(values, key=values.get)
+        if best is None and moves:
+            best = moves[0][0]
+        self.depths.append(depth_done)
+        self.search_time += time.perf_counter() - start
+        return best
+
+    def _moves(self, engine, timed=True):
+        """Return (action, settled child, reward) for every distinct click.
+
+        Clicks that lead to the same board are only kept once, and moves are
+        ordered by immediate reward so the most promising are searched first.
+        Unless timed is false, raises _Timeout once the budget is spent.
+        """
+        moves = [(None, engine, 0)]
+        seen = {engine.key}
+        board = engine.board
+        for idx in range(len(board)):
+            if not board[idx]:
+                continue
+            if timed:
+                self._tick()
+            child = engine.copy()
+            row, col = divmod(idx, engine.cols)
+            if not child.try_move_fruit(row, col):
+                continue
+            child.settle()
+            if child.key in seen:
+                continue
+            seen.add(child.key)
+            moves.append(((row, col), child, child.score - engine.score))
+        moves.sort(key=lambda move: move[2], reverse=True)
+        return moves
+
+    def _lookup(self, key):
+        self.lookups += 1
+        value = self.table.get(key)
+        if value is not None:
+            self.hits += 1
+            self.table.move_to_end(key)
+        return value
+
+    def _store(self, key, value):
+        self.table[key] = value
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+
+    def _tick(self):
+        """Count an expanded position; raises _Timeout once the budget is spent.
+
+        Positions rather than nodes are counted because one node on a large
+        board expands hundreds of them.
+        """
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.countdown = CHECK_INTERVAL
+            if time.perf_counter() > self.deadline:
+                raise _Timeout
+
+    def _max(self, engine, depth):
+        """Value of choosing the best click in a settled position"""
+        if engine.game_over:
+            return LOSS
+        if depth == 0:
+            return self.evaluate(engine)
+        key = (engine.key, depth, False)
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        self.nodes += 1
+        value = max(reward + self._chance(child, depth) for _, child, reward in self._moves(engine))
+        self._store(key, value)
+        return value
+
+    def _chance(self, engine, depth):
+        """Expected value over the next spawn, one ply shallower after it"""
+        if engine.game_over:
+            return LOSS
+        key = (engine.key, depth, True)
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        self.nodes += 1
+        total_weight = sum(engine.weights) * len(engine.open_cols)
+        value = 0.0
+        for col in engine.open_cols:
+            for fruit_type, weight in zip(SPAWN_TYPES, engine.weights):
+                if not weight:
+                    continue
+                self._tick()
+                child = engine.copy()
+                child.spawn_at(col, fruit_type)
+                child.settle()
+                value += weight * (child.score - engine.score + self._max(child, depth - 1))
+        value /= total_weight
+        self._store(key, value)
+        return value
+
+    def evaluate(self, engine):
+        """Heuristic value of a settled position: room left to play"""
+        return engine.board.count(0) * 2.0 + len(engine.open_cols) * 10.0
+
+def wait_for_turn(engine):
+    """Advance until the next spawn has settled, or the game ends"""
+    engine.advance(SPAWN_INTERVAL - engine.next_fruit_timer)
+    while not engine.is_settled() and not engine.game_over:
+        engine.advance(1)
+
+def play(bot, engine, max_ticks=None):
+    """Let the bot play a headless game to the end; returns the engine"""
+    while not engine.game_over and (max_ticks is None or engine.ticks < max_ticks):
+        action = bot.choose(engine)
+        if action is not None:
+            engine.click(*action)
+        wait_for_turn(engine)
+    return engine
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fruit Merge bot headlessly")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--time", type=float, default=20, help="milliseconds per move")
+    parser.add_argument("--depth", type=int, default=4, help="maximum search depth")
+    parser.add_argument("--max-ticks", type=int, default=100000)
+    args = parser.parse_args()
+
+    bot = Bot(time_budget=args.time / 1000, max_depth=args.depth)
+    scores = []
+    for game in range(args.games):
+        engine = play(bot, Engine(seed=args.seed + game), args.max_ticks)
+        scores.append(engine.score)
+        print(f"Game {game}: score {engine.score}, {engine.ticks} ticks, "
+              f"{'over' if engine.game_over else 'stopped'}")
+    print(f"Mean score {sum(scores) / len(scores):.1f}")
+    print(bot.report())
+
+if __name__ == "__main__":
+    main()
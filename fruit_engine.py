@@ -0,0 +1,458 @@
+"""Headless simulation core for Fruit Merge.
+
+Runs the game rules without pygame, a display, fonts or a frame clock, so
+boards can be simulated as fast as Python allows.  fruit_merge.Game is a
+renderer on top of this engine.
+"""
+import bisect
+import functools
+import heapq
+import random
+from collections import deque
+from enum import Enum
+
+# Constants
+GRID_COLS = 4
+GRID_ROWS = 5
+SPAWN_INTERVAL = 120  # Ticks between spawns
+
+class FruitType(Enum):
+    BLUEBERRY = 1
+    JERUK = 2
+    APEL = 3
+    SEMANGKA = 4
+    DURIAN = 5
+
+SPAWN_TYPES = [FruitType.BLUEBERRY, FruitType.JERUK, FruitType.APEL, FruitType.SEMANGKA, FruitType.DURIAN]
+SPAWN_WEIGHTS = [50, 30, 15, 4, 1]  # Mostly smaller fruits
+
+SEED_BITS = 64  # Replays and snapshots store the seed as a u64
+
+def new_seed():
+    """Return a fresh seed for a new session"""
+    return random.randrange(1 << 63)
+
+def normalize_seed(seed):
+    """Map any int seed onto the SEED_BITS-bit range that files can store"""
+    return int(seed) & ((1 << SEED_BITS) - 1)
+
+EMPTY = 0
+MAX_LEVEL = FruitType.DURIAN.value  # Durians never merge
+ZOBRIST_STRIDE = 8  # Keys per cell, indexed by cell value
+
+ZOBRIST_CACHE_SIZE = 16  # Board sizes whose tables are kept around
+
+@functools.lru_cache(maxsize=ZOBRIST_CACHE_SIZE)
+def zobrist_table(cells):
+    """Return the shared Zobrist keys for a board with this many cells.
+
+    Entry idx * ZOBRIST_STRIDE + value is the key of value at cell idx;
+    EMPTY has key 0 so an empty board hashes to 0.  Tables are seeded by
+    the cell count, so one rebuilt after eviction holds the same keys.
+    """
+    rng = random.Random(cells)
+    return [0 if value == EMPTY else rng.getrandbits(64)
+            for _ in range(cells) for value in range(ZOBRIST_STRIDE)]
+
+class Engine:
+    """Fruit Merge rules on a packed board.
+
+    The board is a flat bytearray of rows * cols cells stored row by row;
+    each cell holds EMPTY or a FruitType value.  Copying it is a single
+    bytes() call and bytes(board) is hashable, which keeps search and batch
+    simulation cheap.
+
+    Every cell write goes through _place/_clear, which keep these indexes
+    up to date so no operation has to sweep the whole board:
+
+    - dirty: worklist of changed cells, so check_merges only revisits
+      cells around what changed since the board last settled
+    - heights: number of fruits in each column
+    - unsettled: columns that may hold a fruit above an empty cell, the
+      only ones apply_gravity has to walk
+    - open_cols: sorted empty columns of the top row, for spawning and the
+      game-over check
+    - key: Zobrist hash of the board, for transposition tables
+
+    An optional listener is told about every spawn, move and merge so a
+    renderer can keep its sprites in sync.  It may implement any of
+    fruit_spawned(row, col, fruit_type), fruit_moved(row, col, new_row,
+    new_col, falling) and fruits_merged(row1, col1, row2, col2, new_type).
+
+    Every game is driven by its own random.Random(seed), so a seed plus the
+    player's clicks reproduce a session exactly.  Seeds are reduced to
+    SEED_BITS bits (see normalize_seed) so every session can be saved.  An optional recorder
+    (see fruit_replay.Recorder) is given each spawn and click with the
+    tick it happened on.
+    """
+
+    def __init__(self, seed=None, rng=None, listener=None, weights=SPAWN_WEIGHTS,
+                 rows=GRID_ROWS, cols=GRID_COLS):
+        if rows < 2 or cols < 1:
+            raise ValueError(f"Board must be at least 2x1, got {rows}x{cols}")
+        if seed is not None:
+            seed = normalize_seed(seed)
+        if rng is None:
+            if seed is None:
+                seed = new_seed()
+            rng = random.Random(seed)
+        self.seed = seed
+        self.rng = rng
+        self.listener = listener
+        self.recorder = None
+        self.weights = weights
+        self.rows = rows
+        self.cols = cols
+        self.zobrist = zobrist_table(rows * cols)
+        self.reset()
+
+    def reset(self, seed=None):
+        """Start a new game, reseeding the RNG if a seed is given"""
+        if seed is not None:
+            self.seed = normalize_seed(seed)
+            self.rng = random.Random(self.seed)
+        self.ticks = 0
+        self.board = bytearray(self.rows * self.cols)
+        self.dirty = deque()
+        self.heights = [0] * self.cols
+        self.unsettled = set()
+        self.open_cols = list(range(self.cols))
+        self.key = 0
+        self.score = 0
+        self.merges = [0] * (MAX_LEVEL + 1)  # Merges made, by resulting fruit value
+        self.game_over = False
+        self.next_fruit_timer = 0
+        self.spawn_fruit()
+
+    def cell(self, row, col):
+        """Return the FruitType at (row, col), or None if it is empty"""
+        value = self.board[row * self.cols + col]
+        return FruitType(value) if value else None
+
+    def board_key(self):
+        """Return an immutable, hashable copy of the board"""
+        return bytes(self.board)
+
+    def copy(self):
+        """Return an independent engine in the same state, without listener"""
+        clone = Engine.__new__(Engine)
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        clone.listener = None
+        clone.recorder = None
+        clone.seed = self.seed
+        clone.ticks = self.ticks
+        clone.weights = self.weights
+        clone.rows = self.rows
+        clone.cols = self.cols
+        clone.zobrist = self.zobrist
+        clone.key = self.key
+        clone.board = bytearray(self.board)
+        clone.dirty = deque(self.dirty)
+        clone.heights = self.heights[:]
+        clone.unsettled = set(self.unsettled)
+        clone.open_cols = self.open_cols[:]
+        clone.score = self.score
+        clone.merges = self.merges[:]
+        clone.game_over = self.game_over
+        clone.next_fruit_timer = self.next_fruit_timer
+        return clone
+
+    def save_state(self):
+        """Return a snapshot of the game for restore_state(), e.g. for undo.
+
+        It holds only the board, the pending merge cells, counters and the
+        RNG state; the other indexes are rebuilt from the board on restore.
+        """
+        return (bytes(self.board), tuple(self.dirty), self.score, tuple(self.merges), self.ticks,
+                self.next_fruit_timer, self.game_over, self.rng.getstate())
+
+    def restore_state(self, state):
+        """Return to a save_state() snapshot taken on a board of the same size"""
+        (board, dirty, self.score, merges, self.ticks,
+         self.next_fruit_timer, self.game_over, rng_state) = state
+        if len(board) != self.rows * self.cols:
+            raise ValueError(f"Snapshot has {len(board)} cells, board has {self.rows * self.cols}")
+        self.board = bytearray(board)
+        self.dirty = deque(dirty)
+        self.merges = list(merges)
+        self.rng.setstate(rng_state)
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        """Recompute heights, unsettled, open_cols and key from the board"""
+        board = self.board
+        cols = self.cols
+        zobrist = self.zobrist
+        self.heights = [0] * cols
+        self.unsettled = set()
+        self.key = 0
+        for idx, value in enumerate(board):
+            if value:
+                self.heights[idx % cols] += 1
+                self.key ^= zobrist[idx * ZOBRIST_STRIDE + value]
+                if idx + cols < len(board) and not board[idx + cols]:
+                    self.unsettled.add(idx % cols)
+        self.open_cols = [col for col in range(cols) if not board[col]]
+
+    def _notify(self, event, *args):
+        handler = getattr(self.listener, event, None)
+        if handler is not None:
+            handler(*args)
+
+    def _place(self, idx, value):
+        """Put a fruit into the empty cell idx"""
+        board = self.board
+        cols = self.cols
+        board[idx] = value
+        self.dirty.append(idx)
+        self.key ^= self.zobrist[idx * ZOBRIST_STRIDE + value]
+        col = idx % cols
+        self.heights[col] += 1
+        if idx < cols:
+            self.open_cols.remove(col)
+        if idx + cols < len(board) and not board[idx + cols]:
+            self.unsettled.add(col)
+
+    def _clear(self, idx):
+        """Empty the occupied cell idx"""
+        board = self.board
+        cols = self.cols
+        self.key ^= self.zobrist[idx * ZOBRIST_STRIDE + board[idx]]
+        board[idx] = EMPTY
+        col = idx % cols
+        self.heights[col] -= 1
+        if idx < cols:
+            bisect.insort(self.open_cols, col)
+        elif board[idx - cols]:
+            self.unsettled.add(col)
+
+    def spawn_fruit(self):
+        """Spawn a random fruit at the top"""
+        if self.game_over:
+            return
+
+        if not self.open_cols:
+            self.game_over = True
+            return
+
+        col = self.rng.choice(self.open_cols)
+        fruit_type = self.rng.choices(SPAWN_TYPES, weights=self.weights, k=1)[0]
+        self.spawn_at(col, fruit_type)
+
+    def spawn_at(self, col, fruit_type):
+        """Put a fruit into an open column of the top row, as a spawn"""
+        self._place(col, fruit_type.value)
+        if self.recorder is not None:
+            self.recorder.spawn(self.ticks, col, fruit_type.value)
+        if self.listener is not None:
+            self._notify("fruit_spawned", 0, col, fruit_type)
+
+    def click(self, row, col):
+        """Apply a player input on (row, col)"""
+        if self.recorder is not None:
+            self.recorder.move(self.ticks, row, col)
+        return self.try_move_fruit(row, col)
+
+    def try_move_fruit(self, row, col):
+        """Try to move the fruit at (row, col) down or to adjacent cells"""
+        board = self.board
+        cols = self.cols
+        idx = row * cols + col
+        value = board[idx]
+        if not value:
+            return False
+
+        # Try to move down; a settled column has no gap under any fruit
+        if col in self.unsettled:
+            for new_idx in range(idx + cols, len(board), cols):
+                if not board[new_idx]:
+                    self._clear(idx)
+                    self._place(new_idx, value)
+                    if self.listener is not None:
+                        self._notify("fruit_moved", row, col, new_idx // cols, col, False)
+                    return True
+
+        # If can't move down, try moving to adjacent columns at current row
+        for new_col in [col - 1, col + 1]:
+            if 0 <= new_col < cols and not board[idx - col + new_col]:
+                self._clear(idx)
+                self._place(idx - col + new_col, value)
+                if self.listener is not None:
+                    self._notify("fruit_moved", row, col, row, new_col, False)
+                return True
+
+        return False
+
+    def _find_merge(self, idx):
+        """Return the first neighbour of idx that can merge with it, or -1"""
+        board = self.board
+        cols = self.cols
+        value = board[idx]
+        if not value or value == MAX_LEVEL:
+            return -1
+        col = idx % cols
+        # Same neighbour order as always: right, down, left, up
+        if col + 1 < cols and board[idx + 1] == value:
+            return idx + 1
+        if idx + cols < len(board) and board[idx + cols] == value:
+            return idx + cols
+        if col > 0 and board[idx - 1] == value:
+            return idx - 1
+        if idx >= cols and board[idx - cols] == value:
+            return idx - cols
+        return -1
+
+    def _around(self, idx):
+        """Return idx and its in-bounds neighbours"""
+        cols = self.cols
+        cells = [idx]
+        if idx % cols + 1 < cols:
+            cells.append(idx + 1)
+        if idx + cols < len(self.board):
+            cells.append(idx + cols)
+        if idx % cols > 0:
+            cells.append(idx - 1)
+        if idx >= cols:
+            cells.append(idx - cols)
+        return cells
+
+    def check_merges(self):
+        """Resolve merges around the cells changed since the last pass.
+
+        Merges happen in the same order as a full rescan from the top-left
+        cell after every merge: the board had no merge left after the
+        previous pass, so any new one involves a dirty cell, and a min-heap
+        of candidate cells always yields the first one in scan order.
+        """
+        dirty = self.dirty
+        if not dirty:
+            return
+
+        candidates = set()
+        while dirty:
+            candidates.update(self._around(dirty.popleft()))
+        heap = list(candidates)
+        heapq.heapify(heap)
+
+        while heap:
+            idx = heapq.heappop(heap)
+            other = self._find_merge(idx)
+            if other >= 0:
+                self.merge_fruits(idx, other)
+                # Only the grown fruit can form a new pair
+                for cell in self._around(idx):
+                    heapq.heappush(heap, cell)
+        dirty.clear()
+
+    def merge_fruits(self, idx1, idx2):
+        """Merge the fruits at two cells into a larger one at idx1"""
+        cols = self.cols
+        new_value = self.board[idx1] + 1
+        self._clear(idx2)
+        self.board[idx1] = new_value
+        self.key ^= self.zobrist[idx1 * ZOBRIST_STRIDE + new_value - 1] ^ self.zobrist[idx1 * ZOBRIST_STRIDE + new_value]
+        self.dirty.append(idx1)
+        if self.listener is not None:
+            self._notify("fruits_merged", idx1 // cols, idx1 % cols,
+                         idx2 // cols, idx2 % cols, FruitType(new_value))
+
+        # Update score
+        self.score += new_value * 10
+        self.merges[new_value] += 1
+
+    def apply_gravity(self):
+        """Make fruits in unsettled columns fall down one row"""
+        board = self.board
+        cols = self.cols
+        zobrist = self.zobrist
+        bottom = (self.rows - 1) * cols
+        for col in sorted(self.unsettled):
+            # Walk up only as far as the column's fruits go
+            remaining = self.heights[col] - (1 if board[bottom + col] else 0)
+            moved = False
+            idx = bottom + col - cols
+            while remaining and idx >= 0:
+                if board[idx]:
+                    remaining -= 1
+                    if not board[idx + cols]:
+                        value = board[idx]
+                        board[idx + cols] = value
+                        board[idx] = EMPTY
+                        self.key ^= (zobrist[idx * ZOBRIST_STRIDE + value]
+                                     ^ zobrist[(idx + cols) * ZOBRIST_STRIDE + value])
+                        self.dirty.append(idx + cols)
+                        if idx < cols:
+                            bisect.insort(self.open_cols, col)
+                        moved = True
+                        if self.listener is not None:
+                            row = idx // cols
+                            self._notify("fruit_moved", row, col, row + 1, col, True)
+                idx -= cols
+            if not moved:
+                self.unsettled.discard(col)
+
+    def check_game_over(self):
+        """Check if game is over (top row full)"""
+        return not self.open_cols
+
+    def is_settled(self):
+        """Return whether nothing can fall or merge until the next spawn"""
+        return not self.unsettled and not self.dirty
+
+    def settle(self):
+        """Apply gravity and merges until the board is at rest.
+
+        Unlike update() this does not advance the spawn timer; it is meant
+        for looking ahead from a position, e.g. in a search.
+        """
+        while self.unsettled or self.dirty:
+            self.apply_gravity()
+            self.check_merges()
+        if self.check_game_over():
+            self.game_over = True
+
+    def update(self):
+        """Advance the simulation by one tick"""
+        if self.game_over:
+            return
+
+        self.ticks += 1
+        self.next_fruit_timer += 1
+        if self.next_fruit_timer >= SPAWN_INTERVAL:
+            self.spawn_fruit()
+            self.next_fruit_timer = 0
+
+        self.apply_gravity()
+        self.check_merges()
+
+        if self.check_game_over():
+            self.game_over = True
+
+    def step(self, action=None):
+        """Apply an optional (row, col) move, then advance one tick.
+
+        Returns (reward, done): the score gained and whether the game is over.
+        """
+        score = self.score
+        if action is not None and not self.game_over:
+            self.click(*action)
+        self.update()
+        return self.score - score, self.game_over
+
+    def advance(self, ticks):
+        """Run update() up to ticks times, jumping over idle ticks.
+
+        While nothing can fall or merge, ticks before the next spawn only
+        move the spawn timer, so they are skipped in one go.
+        """
+        while ticks > 0 and not self.game_over:
+            if self.is_settled():
+                idle = min(ticks, SPAWN_INTERVAL - 1 - self.next_fruit_timer)
+                if idle > 0:
+                    self.next_fruit_timer += idle
+                    self.ticks += idle
+                    ticks -= idle
+                    continue
+            self.update()
+            ticks -= 1
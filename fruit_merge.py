@@ -1,23 +1,28 @@
+import argparse
+import gc
+import os
 import pygame
-import random
 import sys
-from enum import Enum
+import time
 from collections import deque
 
+from fruit_bot import Bot
+from fruit_engine import GRID_COLS, GRID_ROWS, Engine, FruitType, new_seed
+from fruit_profiler import Profiler
+from fruit_replay import Recorder, Replay
+from fruit_snapshot import AUTOSAVE_INTERVAL, Autosaver, SnapshotError, load as load_snapshot
+
 # Constants
 WINDOW_WIDTH = 400
 WINDOW_HEIGHT = 600
-GRID_COLS = 4
-GRID_ROWS = 5
 CELL_SIZE = WINDOW_WIDTH // GRID_COLS
 PANEL_HEIGHT = WINDOW_HEIGHT - (GRID_ROWS * CELL_SIZE)
-
-class FruitType(Enum):
-    BLUEBERRY = 1
-    JERUK = 2
-    APEL = 3
-    SEMANGKA = 4
-    DURIAN = 5
+MIN_CELL_SIZE = 2
+TICK_RATE = 60  # Logic ticks per second, independent of frame rate
+TICK_TIME = 1.0 / TICK_RATE
+MAX_FRAME_TIME = 0.25  # Longest stall caught up on, in seconds
+MAX_FPS = 60
+UNDO_DEPTH = 20  # Clicks that can be taken back
 
 FRUIT_COLORS = {
     FruitType.BLUEBERRY: (75, 0, 130),      # Indigo
@@ -35,24 +40,67 @@ FRUIT_NAMES = {
     FruitType.DURIAN: "Durian",
 }
 
+class Layout:
+    """Pixel geometry for a board size.
+
+    Cells are as large as fits the default window, so the classic 4x5 board
+    keeps its 100 px cells and big boards shrink down to MIN_CELL_SIZE.
+    """
+
+    def __init__(self, rows=GRID_ROWS, cols=GRID_COLS):
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = max(MIN_CELL_SIZE, min(WINDOW_WIDTH // cols, (WINDOW_HEIGHT - PANEL_HEIGHT) // rows))
+        self.panel_height = PANEL_HEIGHT
+        self.width = cols * self.cell_size
+        self.height = PANEL_HEIGHT + rows * self.cell_size
+        self.fall_speed = max(1, 5 * self.cell_size // 100)
+
+    def center_x(self, col):
+        return col * self.cell_size + self.cell_size // 2
+
+    def center_y(self, row):
+        return self.panel_height + row * self.cell_size + self.cell_size // 2
+
+    def radius(self, fruit_type):
+        return max(1, (15 + (fruit_type.value - 1) * 5) * self.cell_size // 100)  # Growing size
+
+DEFAULT_LAYOUT = Layout()
+
 class Fruit:
-    def __init__(self, fruit_type, row, col):
+    __slots__ = ("layout", "type", "row", "col", "x", "y", "prev_y", "radius", "is_falling", "fall_speed")
+
+    def __init__(self, fruit_type, row, col, layout=DEFAULT_LAYOUT):
+        self.layout = layout
+        self.fall_speed = layout.fall_speed
+        self.reset(fruit_type, row, col)
+
+    def reset(self, fruit_type, row, col):
+        """Make this a freshly spawned fruit at (row, col)"""
         self.type = fruit_type
         self.row = row
         self.col = col
-        self.x = col * CELL_SIZE + CELL_SIZE // 2
-        self.y = PANEL_HEIGHT + row * CELL_SIZE + CELL_SIZE // 2
-        self.radius = 15 + (fruit_type.value - 1) * 5  # Growing size
+        self.x = self.layout.center_x(col)
+        self.y = self.layout.center_y(row)
+        self.prev_y = self.y  # Position at the previous tick, for interpolation
+        self.radius = self.layout.radius(fruit_type)
+        self.is_falling = True
+
+    def set_type(self, fruit_type):
+        """Turn this fruit into another type, settled at its cell"""
+        self.type = fruit_type
+        self.y = self.prev_y = self.layout.center_y(self.row)
+        self.radius = self.layout.radius(fruit_type)
         self.is_falling = True
-        self.fall_speed = 5
 
     def draw(self, screen):
         pygame.draw.circle(screen, FRUIT_COLORS[self.type], (self.x, self.y), self.radius)
         pygame.draw.circle(screen, (255, 255, 255), (self.x, self.y), self.radius, 2)
 
     def update(self):
+        self.prev_y = self.y
         if self.is_falling:
-            target_y = PANEL_HEIGHT + self.row * CELL_SIZE + CELL_SIZE // 2
+            target_y = self.layout.center_y(self.row)
             if self.y < target_y:
                 self.y += self.fall_speed
                 if self.y >= target_y:
@@ -61,261 +109,472 @@ class Fruit:
             else:
                 self.is_falling = False
 
-class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Fruit Merge")
-        self.clock = pygame.time.Clock()
+class FruitPool:
+    """Free list of Fruit sprites for one layout.
+
+    Sprites removed by merges or a restart are kept and reused for later
+    spawns, so a long session allocates no more sprites than the most it
+    ever showed at once.
+    """
+
+    def __init__(self, layout=DEFAULT_LAYOUT):
+        self.layout = layout
+        self.free = []
+
+    def acquire(self, fruit_type, row, col):
+        if self.free:
+            fruit = self.free.pop()
+            fruit.reset(fruit_type, row, col)
+            return fruit
+        return Fruit(fruit_type, row, col, self.layout)
+
+    def release(self, fruit):
+        self.free.append(fruit)
+
+class Renderer:
+    """Draws a Game from cached layers, pushing only changed rectangles.
+
+    The panel, title and grid are drawn once into a background surface,
+    each FruitType gets one pre-drawn sprite and the score text is only
+    re-rendered when the score changes.  Every frame the areas left by
+    moved, merged or removed fruits are restored from the background and
+    handed to pygame.display.update().
+    """
+
+    def __init__(self, screen, layout=DEFAULT_LAYOUT):
+        self.screen = screen
+        self.layout = layout
         self.font_large = pygame.font.Font(None, 40)
         self.font_medium = pygame.font.Font(None, 24)
         self.font_small = pygame.font.Font(None, 20)
-        
-        self.grid = [[None for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-        self.fruits = []
-        self.score = 0
-        self.game_over = False
-        self.next_fruit_timer = 0
-        
-        # Spawn first fruit
-        self.spawn_fruit()
 
-    def spawn_fruit(self):
-        """Spawn a random fruit at the top"""
-        if self.game_over:
+        self.background = self._draw_background()
+        self.sprites = {fruit_type: self._draw_sprite(fruit_type) for fruit_type in FruitType}
+        self.overlay = pygame.Surface((layout.width, layout.height))
+        self.overlay.set_alpha(200)
+        self.overlay.fill((0, 0, 0))
+        self.font_stats = pygame.font.Font(None, 16)
+        self.stats_lines = None  # Profiler overlay text, when shown
+        self.restart_text = self.font_small.render("Press SPACE to restart or Q to quit", True, (255, 255, 255))
+        self.game_over_text = self.font_large.render("GAME OVER!", True, (255, 0, 0))
+        self.invalidate()
+
+    def _draw_background(self):
+        layout = self.layout
+        background = pygame.Surface((layout.width, layout.height)).convert()
+        background.fill((240, 240, 240))
+
+        # Draw panel
+        pygame.draw.rect(background, (200, 200, 200), (0, 0, layout.width, layout.panel_height))
+
+        # Draw title
+        title = self.font_large.render("Fruit Merge", True, (0, 0, 0))
+        background.blit(title, title.get_rect(center=(layout.width // 2, layout.panel_height // 3)))
+
+        # Draw grid
+        size = layout.cell_size
+        border = 2 if size >= 20 else 1
+        for row in range(layout.rows):
+            for col in range(layout.cols):
+                x = col * size
+                y = layout.panel_height + row * size
+                pygame.draw.rect(background, (200, 200, 200), (x, y, size, size), border)
+        return background
+
+    def _draw_sprite(self, fruit_type):
+        radius = self.layout.radius(fruit_type)
+        size = radius * 2 + 2
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA).convert_alpha()
+        center = (radius + 1, radius + 1)
+        pygame.draw.circle(sprite, FRUIT_COLORS[fruit_type], center, radius)
+        pygame.draw.circle(sprite, (255, 255, 255), center, radius, min(2, radius))
+        return sprite
+
+    def invalidate(self):
+        """Force a full redraw on the next frame"""
+        self.full_redraw = True
+        self.drawn = {}  # Fruit -> (rect, type) as last drawn
+        self.score = None
+        self.score_rect = pygame.Rect(0, 0, 0, 0)
+        self.stats_shown = None
+        self.stats_rect = pygame.Rect(0, 0, 0, 0)
+        self.showing_game_over = False
+        self.flip_pending = False
+        self.dirty = []
+
+    def fruit_rect(self, fruit, alpha=1.0):
+        """Return the sprite rect of a fruit, alpha of the way into its last tick"""
+        y = round(fruit.prev_y + (fruit.y - fruit.prev_y) * alpha)
+        size = fruit.radius * 2 + 2
+        return pygame.Rect(fruit.x - fruit.radius - 1, y - fruit.radius - 1, size, size)
+
+    def _render_stats(self):
+        surfaces = [self.font_stats.render(line, True, (0, 0, 0)) for line in self.stats_lines]
+        width = max(surface.get_width() for surface in surfaces)
+        height = sum(surface.get_height() for surface in surfaces)
+        self.stats_surface = pygame.Surface((width, height)).convert()
+        self.stats_surface.fill((200, 200, 200))
+        y = 0
+        for surface in surfaces:
+            self.stats_surface.blit(surface, (0, y))
+            y += surface.get_height()
+        self.stats_rect = self.stats_surface.get_rect(topleft=(4, 4))
+
+    def draw(self, game, alpha=1.0):
+        """Draw the game, updating only what changed since the last frame.
+
+        alpha is how far rendering is between the last two logic ticks and
+        is used to interpolate falling fruits.
+        """
+        if game.game_over and self.showing_game_over:
             return
+
+        screen = self.screen
+        dirty = []
+        drawn = {}
+        for fruit in game.fruits:
+            rect = self.fruit_rect(fruit, alpha)
+            drawn[fruit] = (rect, fruit.type)
+            old = self.drawn.pop(fruit, None)
+            if old != (rect, fruit.type):
+                if old is None:
+                    dirty.append(rect)
+                elif rect.colliderect(old[0]):
+                    # A falling fruit: one rect covers both positions
+                    dirty.append(rect.union(old[0]))
+                else:
+                    dirty.append(rect)
+                    dirty.append(old[0])
+        # Fruits that changed or disappeared leave their old area behind
+        dirty.extend(rect for rect, _ in self.drawn.values())
+        self.drawn = drawn
+
+        if game.score != self.score:
+            self.score = game.score
+            dirty.append(self.score_rect)
+            self.score_text = self.font_medium.render(f"Score: {game.score}", True, (0, 0, 0))
+            self.score_rect = self.score_text.get_rect(center=(self.layout.width // 2, self.layout.panel_height * 2 // 3))
+            dirty.append(self.score_rect)
+
+        if self.stats_lines is not self.stats_shown:
+            dirty.append(self.stats_rect)
+            self.stats_shown = self.stats_lines
+            if self.stats_lines:
+                self._render_stats()
+                dirty.append(self.stats_rect)
+            else:
+                self.stats_rect = pygame.Rect(0, 0, 0, 0)
+
+        if self.full_redraw or game.game_over:
+            dirty = [screen.get_rect()]
+
+        for rect in dirty:
+            screen.blit(self.background, rect, rect)
+        if self.score_rect.collidelist(dirty) >= 0:
+            screen.blit(self.score_text, self.score_rect)
+        for fruit, (rect, fruit_type) in drawn.items():
+            if rect.collidelist(dirty) >= 0:
+                screen.blit(self.sprites[fruit_type], rect)
+        if self.stats_shown and self.stats_rect.collidelist(dirty) >= 0:
+            screen.blit(self.stats_surface, self.stats_rect)
+
+        # Draw game over screen
+        if game.game_over:
+            center_x = self.layout.width // 2
+            center_y = self.layout.height // 2
+            screen.blit(self.overlay, (0, 0))
+            screen.blit(self.game_over_text, self.game_over_text.get_rect(center=(center_x, center_y - 40)))
+            score_final = self.font_medium.render(f"Final Score: {game.score}", True, (255, 255, 255))
+            screen.blit(score_final, score_final.get_rect(center=(center_x, center_y + 20)))
+            screen.blit(self.restart_text, self.restart_text.get_rect(center=(center_x, center_y + 80)))
+            self.showing_game_over = True
+
+        self.flip_pending = self.full_redraw or game.game_over
+        self.full_redraw = False
+        self.dirty = dirty
+
+    def present(self):
+        """Push what the last draw() changed to the display"""
+        if self.flip_pending:
+            pygame.display.flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+        self.flip_pending = False
+        self.dirty = []
+
+class Game:
+    def __init__(self, engine=None, profiler=None, rows=GRID_ROWS, cols=GRID_COLS,
+                 seed=None, record_dir=None, replay=None, player=None, autosave=None):
+        # A replay or a player such as fruit_bot.Bot can stand in for the mouse
+        self.replay = replay
+        self.player = player
+        self.turn_pending = False
+        if replay is not None:
+            engine = replay.new_engine()
+        elif engine is None:
+            engine = Engine(seed=seed, rows=rows, cols=cols)
+        self.engine = engine
+        self.layout = Layout(engine.rows, engine.cols)
         
-        # Try to find empty spot in top row
-        empty_cols = [col for col in range(GRID_COLS) if self.grid[0][col] is None]
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.layout.width, self.layout.height))
+        pygame.display.set_caption("Fruit Merge")
+        self.clock = pygame.time.Clock()
+        self.renderer = Renderer(self.screen, self.layout)
         
-        if not empty_cols:
-            self.game_over = True
-            return
+        # Sprites mirroring the engine board, kept in sync by its events
+        self.pool = FruitPool(self.layout)
+        self.grid = [[None for _ in range(engine.cols)] for _ in range(engine.rows)]
+        self.fruits = {}  # Live sprites in spawn order; a dict for O(1) removal
+        self.engine.listener = self
+        self.sync_sprites()
+        
+        # Optional per-phase timing, shown with F3 and reported on exit
+        self.profiler = profiler
+        self.show_stats = False
+        if profiler is not None:
+            self.update = profiler.wrap("update", self.update)
+            self.update_sprites = profiler.wrap("sprites", self.update_sprites)
+            self.draw = profiler.wrap("draw", self.draw)
+            self.present = profiler.wrap("flip", self.present)
+            self.engine.apply_gravity = profiler.wrap("apply_gravity", self.engine.apply_gravity)
+            self.engine.check_merges = profiler.wrap("check_merges", self.engine.check_merges)
         
-        col = random.choice(empty_cols)
-        # Randomly choose a fruit (mostly smaller fruits)
-        fruit_type = random.choices(
-            [FruitType.BLUEBERRY, FruitType.JERUK, FruitType.APEL, FruitType.SEMANGKA, FruitType.DURIAN],
-            weights=[50, 30, 15, 4, 1],
-            k=1
-        )[0]
+        self.record_dir = record_dir
+        self.start_session()
         
-        fruit = Fruit(fruit_type, 0, col)
-        self.grid[0][col] = fruit
-        self.fruits.append(fruit)
+        # Optional fruit_snapshot.Autosaver, fed from run()
+        self.autosave = autosave
+        self.undo_states = deque(maxlen=UNDO_DEPTH)
+
+    @property
+    def score(self):
+        return self.engine.score
+
+    @property
+    def game_over(self):
+        return self.engine.game_over
+
+    def start_session(self):
+        """Start recording and/or replaying the session the engine just began"""
+        if self.replay is not None:
+            self.replay_moves = deque(self.replay.moves)
+        # A replay starts from the seed, so a resumed session can't be recorded
+        if self.record_dir is not None and self.engine.ticks == 0:
+            self.engine.recorder = Recorder(self.engine)
+
+    def end_session(self):
+        """Save the current session's recording, if one is being made"""
+        recorder = self.engine.recorder
+        if recorder is not None and not recorder.finished:
+            os.makedirs(self.record_dir, exist_ok=True)
+            path = os.path.join(self.record_dir, f"fruit-{self.engine.seed:016x}.fmr")
+            recorder.save(path, self.engine)
+
+    def clear_sprites(self):
+        """Return every sprite to the pool"""
+        for fruit in self.fruits:
+            self.pool.release(fruit)
+        self.fruits.clear()
+        for cells in self.grid:
+            cells[:] = [None] * len(cells)
+
+    def sync_sprites(self):
+        """Rebuild all sprites from the engine board"""
+        self.clear_sprites()
+        for row in range(self.engine.rows):
+            for col in range(self.engine.cols):
+                fruit_type = self.engine.cell(row, col)
+                if fruit_type is not None:
+                    self.fruit_spawned(row, col, fruit_type)
+
+    def fruit_spawned(self, row, col, fruit_type):
+        fruit = self.pool.acquire(fruit_type, row, col)
+        self.grid[row][col] = fruit
+        self.fruits[fruit] = None
+        self.turn_pending = True
+
+    def fruit_moved(self, row, col, new_row, new_col, falling):
+        fruit = self.grid[row][col]
+        self.grid[row][col] = None
+        self.grid[new_row][new_col] = fruit
+        fruit.row = new_row
+        fruit.col = new_col
+        fruit.x = self.layout.center_x(new_col)
+        if falling:
+            fruit.is_falling = True
+        elif new_row != row:
+            fruit.is_falling = False
+            fruit.y = fruit.prev_y = self.layout.center_y(new_row)
+
+    def fruits_merged(self, row1, col1, row2, col2, new_type):
+        # Reuse the surviving sprite and pool the other one
+        merged = self.grid[row2][col2]
+        del self.fruits[merged]
+        self.pool.release(merged)
+        self.grid[row2][col2] = None
+        self.grid[row1][col1].set_type(new_type)
 
     def handle_click(self, pos):
         """Handle mouse click to move/select fruit"""
         x, y = pos
         
-        if y < PANEL_HEIGHT:
+        if y < self.layout.panel_height:
             return
         
-        row = (y - PANEL_HEIGHT) // CELL_SIZE
-        col = x // CELL_SIZE
+        row = (y - self.layout.panel_height) // self.layout.cell_size
+        col = x // self.layout.cell_size
         
-        if row < 0 or row >= GRID_ROWS or col < 0 or col >= GRID_COLS:
+        if row < 0 or row >= self.engine.rows or col < 0 or col >= self.engine.cols:
             return
         
-        if self.grid[row][col] is not None:
-            fruit = self.grid[row][col]
-            # Try to move fruit down
-            self.try_move_fruit(fruit, row, col)
-
-    def try_move_fruit(self, fruit, row, col):
-        """Try to move fruit down or to adjacent cells"""
-        # Try to move down
-        for new_row in range(row + 1, GRID_ROWS):
-            if self.grid[new_row][col] is None:
-                self.grid[row][col] = None
-                self.grid[new_row][col] = fruit
-                fruit.row = new_row
-                fruit.is_falling = False
-                fruit.y = PANEL_HEIGHT + new_row * CELL_SIZE + CELL_SIZE // 2
-                return True
-        
-        # If can't move down, try moving to adjacent columns at current row
-        for new_col in [col - 1, col + 1]:
-            if 0 <= new_col < GRID_COLS and self.grid[row][new_col] is None:
-                self.grid[row][col] = None
-                self.grid[row][new_col] = fruit
-                fruit.col = new_col
-                fruit.x = new_col * CELL_SIZE + CELL_SIZE // 2
-                return True
-        
-        return False
-
-    def check_merges(self):
-        """Check for possible merges"""
-        merged = True
-        while merged:
-            merged = False
-            for row in range(GRID_ROWS):
-                for col in range(GRID_COLS):
-                    if self.grid[row][col] is not None:
-                        fruit = self.grid[row][col]
-                        # Check adjacent cells for same fruit type
-                        for dr, dc in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                            new_row, new_col = row + dr, col + dc
-                            if 0 <= new_row < GRID_ROWS and 0 <= new_col < GRID_COLS:
-                                adjacent = self.grid[new_row][new_col]
-                                if adjacent and adjacent.type == fruit.type and fruit.type != FruitType.DURIAN:
-                                    # Merge fruits
-                                    self.merge_fruits(fruit, adjacent, row, col, new_row, new_col)
-                                    merged = True
-                                    break
-                        if merged:
-                            break
-                if merged:
-                    break
-
-    def merge_fruits(self, fruit1, fruit2, row1, col1, row2, col2):
-        """Merge two fruits into a larger one"""
-        # Remove both fruits
-        self.grid[row1][col1] = None
-        self.grid[row2][col2] = None
-        self.fruits.remove(fruit1)
-        self.fruits.remove(fruit2)
+        # Undo would rewind a recording, so only keep states when not recording
+        if self.engine.recorder is None:
+            self.undo_states.append(self.engine.save_state())
         
-        # Create new fruit at fruit1's position
-        new_type = FruitType(fruit1.type.value + 1)
-        new_fruit = Fruit(new_type, row1, col1)
-        self.grid[row1][col1] = new_fruit
-        self.fruits.append(new_fruit)
-        
-        # Update score
-        self.score += new_type.value * 10
-
-    def apply_gravity(self):
-        """Make fruits fall down"""
-        for row in range(GRID_ROWS - 2, -1, -1):
-            for col in range(GRID_COLS):
-                fruit = self.grid[row][col]
-                if fruit is not None:
-                    # Try to move down
-                    for new_row in range(row + 1, GRID_ROWS):
-                        if self.grid[new_row][col] is None:
-                            self.grid[row][col] = None
-                            self.grid[new_row][col] = fruit
-                            fruit.row = new_row
-                            fruit.is_falling = True
-                            break
-                        else:
-                            break
-
-    def check_game_over(self):
-        """Check if game is over (top row full)"""
-        for col in range(GRID_COLS):
-            if self.grid[0][col] is None:
-                return False
-        return True
+        # Try to move fruit down
+        self.engine.click(row, col)
+
+    def undo(self):
+        """Take back the last click"""
+        if self.undo_states:
+            self.engine.restore_state(self.undo_states.pop())
+            self.sync_sprites()
+            self.renderer.invalidate()
 
     def update(self):
         """Update game state"""
         if self.game_over:
             return
         
-        # Update fruit positions
-        for fruit in self.fruits:
-            fruit.update()
-        
-        # Spawn new fruit every 60 frames
-        self.next_fruit_timer += 1
-        if self.next_fruit_timer >= 120:
-            self.spawn_fruit()
-            self.next_fruit_timer = 0
-        
-        # Apply gravity
-        self.apply_gravity()
+        self.update_sprites()
         
-        # Check for merges
-        self.check_merges()
+        if self.replay is not None:
+            moves = self.replay_moves
+            while moves and moves[0][0] == self.engine.ticks:
+                _, row, col = moves.popleft()
+                self.engine.click(row, col)
         
-        # Check game over
-        if self.check_game_over():
-            self.game_over = True
+        self.engine.update()
+        if self.game_over:
+            self.end_session()
+        elif self.player is not None and self.turn_pending and self.engine.is_settled():
+            # The player moves once per spawn, after it has landed
+            self.turn_pending = False
+            action = self.player.choose(self.engine)
+            if action is not None:
+                self.engine.click(*action)
 
-    def draw(self):
-        """Draw game"""
-        self.screen.fill((240, 240, 240))
-        
-        # Draw panel
-        pygame.draw.rect(self.screen, (200, 200, 200), (0, 0, WINDOW_WIDTH, PANEL_HEIGHT))
-        
-        # Draw title
-        title = self.font_large.render("Fruit Merge", True, (0, 0, 0))
-        title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, PANEL_HEIGHT // 3))
-        self.screen.blit(title, title_rect)
-        
-        # Draw score
-        score_text = self.font_medium.render(f"Score: {self.score}", True, (0, 0, 0))
-        score_rect = score_text.get_rect(center=(WINDOW_WIDTH // 2, PANEL_HEIGHT * 2 // 3))
-        self.screen.blit(score_text, score_rect)
-        
-        # Draw grid
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS):
-                x = col * CELL_SIZE
-                y = PANEL_HEIGHT + row * CELL_SIZE
-                pygame.draw.rect(self.screen, (200, 200, 200), (x, y, CELL_SIZE, CELL_SIZE), 2)
-        
-        # Draw fruits
+    def update_sprites(self):
+        """Move falling fruits one tick towards their cells"""
         for fruit in self.fruits:
-            fruit.draw(self.screen)
-        
-        # Draw game over screen
-        if self.game_over:
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            overlay.set_alpha(200)
-            overlay.fill((0, 0, 0))
-            self.screen.blit(overlay, (0, 0))
-            
-            game_over_text = self.font_large.render("GAME OVER!", True, (255, 0, 0))
-            game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 40))
-            self.screen.blit(game_over_text, game_over_rect)
-            
-            score_final = self.font_medium.render(f"Final Score: {self.score}", True, (255, 255, 255))
-            score_final_rect = score_final.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 20))
-            self.screen.blit(score_final, score_final_rect)
-            
-            restart_text = self.font_small.render("Press SPACE to restart or Q to quit", True, (255, 255, 255))
-            restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 80))
-            self.screen.blit(restart_text, restart_rect)
-        
-        pygame.display.flip()
+            fruit.update()
+
+    def draw(self, alpha=1.0):
+        """Draw game, alpha of the way from the previous tick to the latest"""
+        self.renderer.draw(self, alpha)
+
+    def present(self):
+        """Show the drawn frame"""
+        self.renderer.present()
 
     def restart(self):
         """Restart the game"""
-        self.grid = [[None for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-        self.fruits = []
-        self.score = 0
-        self.game_over = False
-        self.next_fruit_timer = 0
-        self.spawn_fruit()
+        self.end_session()
+        self.clear_sprites()
+        self.undo_states.clear()
+        self.engine.reset(self.replay.seed if self.replay is not None else new_seed())
+        self.start_session()
+        self.renderer.invalidate()
 
     def run(self):
-        """Main game loop"""
+        """Main game loop: logic at a fixed TICK_RATE, drawing once per frame"""
+        # Setup objects live for the whole run; keep them out of GC passes
+        gc.collect()
+        gc.freeze()
         running = True
+        frames = 0
+        accumulator = 0.0
+        previous = time.perf_counter()
+        next_autosave = previous + AUTOSAVE_INTERVAL
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.renderer.invalidate()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if not self.game_over:
+                    if not self.game_over and self.replay is None and self.player is None:
                         self.handle_click(event.pos)
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_q:
                         running = False
                     elif event.key == pygame.K_SPACE and self.game_over:
                         self.restart()
+                    elif event.key == pygame.K_u and self.replay is None and self.player is None:
+                        self.undo()
+                    elif event.key == pygame.K_F3 and self.profiler is not None:
+                        self.show_stats = not self.show_stats
+                        self.renderer.stats_lines = None
             
-            self.update()
-            self.draw()
-            self.clock.tick(60)
+            # Catch up on whole ticks; a slow frame never slows the game down
+            now = time.perf_counter()
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            while accumulator >= TICK_TIME:
+                self.update()
+                accumulator -= TICK_TIME
+            
+            if self.autosave is not None and now >= next_autosave:
+                self.autosave.submit(self.engine)
+                next_autosave = now + AUTOSAVE_INTERVAL
+            
+            frames += 1
+            if self.show_stats and frames % 30 == 0:
+                self.renderer.stats_lines = self.profiler.report().splitlines()
+            self.draw(accumulator / TICK_TIME)
+            self.present()
+            self.clock.tick(MAX_FPS)
         
+        self.end_session()
+        if self.autosave is not None:
+            self.autosave.submit(self.engine)
+            self.autosave.close()
+        if self.profiler is not None:
+            print(self.profiler.report())
+        if self.player is not None:
+            print(self.player.report())
         pygame.quit()
         sys.exit()
 
-if __name__ == "__main__":
-    game = Game()
+def main():
+    parser = argparse.ArgumentParser(description="Fruit Merge")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase; F3 toggles the overlay, percentiles are printed on exit")
+    parser.add_argument("--rows", type=int, default=GRID_ROWS)
+    parser.add_argument("--cols", type=int, default=GRID_COLS)
+    parser.add_argument("--seed", type=int, help="seed of the first session")
+    parser.add_argument("--record", metavar="DIR", help="save a replay of every session in DIR")
+    parser.add_argument("--replay", metavar="FILE", help="watch a recorded session at real speed")
+    parser.add_argument("--bot", action="store_true", help="let the search bot play")
+    parser.add_argument("--bot-time", type=float, default=30, help="bot thinking time per move in ms")
+    parser.add_argument("--save", metavar="FILE", help="autosave to FILE and resume from it on startup")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay) if args.replay else None
+    engine = None
+    if args.save and replay is None and os.path.exists(args.save):
+        try:
+            engine = load_snapshot(args.save)
+        except (OSError, SnapshotError) as e:
+            print(f"Not resuming from {args.save}: {e}")
+        if engine is not None and engine.game_over:
+            engine = None
+    game = Game(engine=engine, profiler=Profiler() if args.profile else None, rows=args.rows, cols=args.cols,
+                seed=args.seed, record_dir=args.record, replay=replay,
+                player=Bot(time_budget=args.bot_time / 1000) if args.bot else None,
+                autosave=Autosaver(args.save) if args.save and replay is None else None)
     game.run()
+
+if __name__ == "__main__":
+    main()
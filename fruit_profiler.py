@@ -0,0 +1,59 @@
+"""Per-phase timing for the Fruit Merge loop.
+
+Keeps the most recent samples of each phase (update, sprites,
+apply_gravity, check_merges, draw, flip, ...) in fixed-size ring
+buffers, so it can run for a whole session without growing, and
+summarizes them as percentiles for an on-screen overlay or a report on
+exit.
+"""
+import time
+from collections import deque
+
+PHASES = ("update", "sprites", "apply_gravity", "check_merges", "draw", "flip")
+
+class Profiler:
+    def __init__(self, phases=PHASES, size=600):
+        self.size = size
+        self.samples = {phase: deque(maxlen=size) for phase in phases}
+
+    def record(self, phase, seconds):
+        """Add one timing sample for a phase"""
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.size)
+        samples.append(seconds)
+
+    def wrap(self, phase, func):
+        """Return func timed into the given phase"""
+        samples = self.samples.setdefault(phase, deque(maxlen=self.size))
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples.append(perf_counter() - start)
+
+        return timed
+
+    def percentiles(self, phase, points=(50, 95, 99)):
+        """Return nearest-rank percentiles of a phase in seconds"""
+        data = sorted(self.samples.get(phase, ()))
+        if not data:
+            return [0.0 for _ in points]
+        return [data[min(len(data) - 1, len(data) * point // 100)] for point in points]
+
+    def summary_lines(self):
+        """Return one 'phase p50 p95 max' line per phase, in milliseconds"""
+        lines = []
+        for phase, samples in self.samples.items():
+            p50, p95 = self.percentiles(phase, (50, 95))
+            worst = max(samples, default=0.0)
+            lines.append(f"{phase:<14}{p50 * 1000:6.2f}{p95 * 1000:7.2f}{worst * 1000:7.2f}")
+        return lines
+
+    def report(self):
+        """Return a text table of all phases"""
+        header = f"{'phase (ms)':<14}{'p50':>6}{'p95':>7}{'max':>7}"
+        return "\n".join([header] + self.summary_lines())
@@ -0,0 +1,235 @@
+"""Deterministic replays for Fruit Merge sessions.
+
+A session is fully determined by its seed, board size, spawn weights and
+the player's clicks, so a replay only stores those plus every spawn (to
+pinpoint where a replay diverges) and the final state (to verify it).
+
+File layout, all integers little-endian:
+
+    header  "FMRP", version u8, rows u16, cols u16, seed u64,
+            weight count u8, weights u16 each
+    events  varint((tick delta << 2) | kind) followed by
+              kind 0 (move):  varint row, varint col
+              kind 1 (spawn): varint col, u8 fruit value
+              kind 2 (end):   varint score, rows * cols board bytes
+
+Verify recorded sessions headlessly at full speed:
+
+    python fruit_replay.py replays/*.fmr
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+from fruit_engine import SPAWN_TYPES, Engine
+
+MAGIC = b"FMRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHQB")
+
+MOVE = 0
+SPAWN = 1
+END = 2
+
+class ReplayError(Exception):
+    pass
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class Recorder:
+    """Collects one session's clicks and spawns as a binary replay.
+
+    Attach it right after a reset: engine.recorder = Recorder(engine).
+    """
+
+    def __init__(self, engine):
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, engine.rows, engine.cols,
+                                          engine.seed, len(engine.weights)))
+        self.data += struct.pack(f"<{len(engine.weights)}H", *engine.weights)
+        self.tick = engine.ticks
+        self.finished = False
+
+    def _event(self, tick, kind):
+        _write_varint(self.data, (tick - self.tick) << 2 | kind)
+        self.tick = tick
+
+    def move(self, tick, row, col):
+        self._event(tick, MOVE)
+        _write_varint(self.data, row)
+        _write_varint(self.data, col)
+
+    def spawn(self, tick, col, value):
+        self._event(tick, SPAWN)
+        _write_varint(self.data, col)
+        self.data.append(value)
+
+    def finish(self, engine):
+        """Close the replay with the engine's current state and return it"""
+        if not self.finished:
+            self._event(engine.ticks, END)
+            _write_varint(self.data, engine.score)
+            self.data += engine.board
+            self.finished = True
+        return bytes(self.data)
+
+    def save(self, path, engine):
+        """Finish the replay and write it to path"""
+        data = self.finish(engine)
+        with open(path, "wb") as f:
+            f.write(data)
+
+class Replay:
+    """A parsed replay: session parameters, events and final state"""
+
+    def __init__(self, rows, cols, seed, weights, moves, spawns, final_tick, score, board):
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed
+        self.weights = weights
+        self.moves = moves    # [(tick, row, col)]
+        self.spawns = spawns  # [(tick, col, value)]
+        self.final_tick = final_tick
+        self.score = score
+        self.board = board
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            magic, version, rows, cols, seed, weight_count = HEADER.unpack_from(data)
+        except struct.error:
+            raise ReplayError("Truncated replay header")
+        if magic != MAGIC:
+            raise ReplayError("Not a Fruit Merge replay")
+        if version != VERSION:
+            raise ReplayError(f"Unsupported replay version {version}")
+        if rows < 2 or cols < 1:
+            raise ReplayError(f"Invalid board size {rows}x{cols}")
+        pos = HEADER.size
+        try:
+            weights = list(struct.unpack_from(f"<{weight_count}H", data, pos))
+        except struct.error:
+            raise ReplayError("Truncated replay header")
+        if len(weights) != len(SPAWN_TYPES) or not any(weights):
+            raise ReplayError(f"Invalid spawn weights {weights}")
+        pos += 2 * weight_count
+
+        moves, spawns = [], []
+        tick = 0
+        try:
+            while True:
+                value, pos = _read_varint(data, pos)
+                tick += value >> 2
+                kind = value & 3
+                if kind == MOVE:
+                    row, pos = _read_varint(data, pos)
+                    col, pos = _read_varint(data, pos)
+                    if row >= rows or col >= cols:
+                        raise ReplayError(f"Move at ({row}, {col}) is outside the {rows}x{cols} board")
+                    moves.append((tick, row, col))
+                elif kind == SPAWN:
+                    col, pos = _read_varint(data, pos)
+                    spawns.append((tick, col, data[pos]))
+                    pos += 1
+                elif kind == END:
+                    score, pos = _read_varint(data, pos)
+                    board = bytes(data[pos:pos + rows * cols])
+                    if len(board) != rows * cols:
+                        raise IndexError
+                    return cls(rows, cols, seed, weights, moves, spawns, tick, score, board)
+                else:
+                    raise ReplayError(f"Unknown event kind {kind}")
+        except IndexError:
+            raise ReplayError("Replay ends before its final state")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def new_engine(self):
+        """Return an engine at the start of this session"""
+        return Engine(seed=self.seed, weights=self.weights, rows=self.rows, cols=self.cols)
+
+class _SpawnLog:
+    def __init__(self):
+        self.spawns = []
+
+    def spawn(self, tick, col, value):
+        self.spawns.append((tick, col, value))
+
+    def move(self, tick, row, col):
+        pass
+
+def verify(replay):
+    """Fast-forward a replay headlessly and check it reproduces the session.
+
+    Returns the finished engine; raises ReplayError on the first mismatch.
+    """
+    engine = replay.new_engine()
+    log = _SpawnLog()
+    engine.recorder = log
+    for tick, row, col in replay.moves:
+        engine.advance(tick - engine.ticks)
+        if engine.ticks != tick:
+            raise ReplayError(f"Game ended at tick {engine.ticks}, before the move at tick {tick}")
+        engine.click(row, col)
+    engine.advance(replay.final_tick - engine.ticks)
+
+    for expected, actual in zip(replay.spawns, log.spawns):
+        if expected != actual:
+            raise ReplayError(f"Spawn diverged: recorded {expected}, replayed {actual}")
+    if len(replay.spawns) != len(log.spawns):
+        raise ReplayError(f"{len(log.spawns)} spawns replayed, {len(replay.spawns)} recorded")
+    if engine.ticks != replay.final_tick:
+        raise ReplayError(f"Replay ended at tick {engine.ticks}, recorded {replay.final_tick}")
+    if engine.score != replay.score:
+        raise ReplayError(f"Final score {engine.score}, recorded {replay.score}")
+    if bytes(engine.board) != replay.board:
+        raise ReplayError("Final board differs from the recording")
+    return engine
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify Fruit Merge replays headlessly")
+    parser.add_argument("paths", nargs="+", help="replay files or directories of them")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".fmr"))
+        else:
+            paths.append(path)
+
+    failed = 0
+    ticks = 0
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            engine = verify(Replay.load(path))
+            ticks += engine.ticks
+        except (OSError, ReplayError) as e:
+            failed += 1
+            print(f"FAIL {path}: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths) - failed}/{len(paths)} replays verified, {ticks} ticks in {elapsed:.2f}s")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
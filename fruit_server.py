@@ -0,0 +1,338 @@
+"""Asyncio server hosting many headless Fruit Merge sessions.
+
+Clients talk newline-delimited JSON over TCP.  One connection can run
+any number of sessions; all sessions on the server are advanced together
+by a single scheduler at TICK_RATE, and after each tick a connection gets
+one message with what changed on each of its sessions, never full boards.
+
+Requests (each answered in order on the same connection):
+
+    {"op": "new", "seed": 1, "rows": 5, "cols": 4}  -> {"type": "session", "id", "seed",
+                                                        "rows", "cols", "board", "score"}
+    {"op": "click", "id": 7, "row": 3, "col": 1}     applied at the start of the next tick
+    {"op": "close", "id": 7}
+    {"op": "metrics"}                               -> {"type": "metrics", ...}
+
+Per-tick updates list [id, [[cell, value], ...], score, game_over] for
+every session that changed; a finished session is dropped after its last
+update.  Run a server, then saturate it with the bundled load generator:
+
+    python fruit_server.py serve --port 8765
+    python fruit_server.py load --port 8765 --connections 20 --sessions 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+from fruit_engine import GRID_COLS, GRID_ROWS, Engine, new_seed
+from fruit_profiler import Profiler
+
+TICK_RATE = 60
+MAX_BOARD_CELLS = 10000
+MAX_BUFFER = 1 << 20  # Bytes queued to a client before it is dropped as too slow
+RATE_WINDOW = 10.0  # Seconds over which sessions/second is measured
+
+class Session:
+    def __init__(self, session_id, connection, engine):
+        self.id = session_id
+        self.connection = connection
+        self.engine = engine
+        self.board = bytes(engine.board)  # As last sent to the client
+        self.score = engine.score
+        self.clicks = []
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.sessions = {}
+        self.updates = []  # Session diffs for the current tick
+
+    def send(self, message):
+        self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+class Server:
+    """Sessions, the shared tick scheduler and their metrics"""
+
+    def __init__(self, tick_rate=TICK_RATE):
+        self.tick_time = 1.0 / tick_rate
+        self.sessions = {}
+        self.connections = set()
+        self.next_id = 1
+        self.ticks = 0
+        self.started = deque()  # Start times of recent sessions
+        self.sessions_total = 0
+        self.games_finished = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.profiler = Profiler(("tick", "lag"))
+
+    async def handle(self, reader, writer):
+        """Serve one client connection until it disconnects"""
+        connection = Connection(writer)
+        self.connections.add(connection)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.request(connection, json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"type": "error", "error": str(e)}
+                if reply is not None:
+                    connection.send(reply)
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(connection)
+            for session_id in list(connection.sessions):
+                self.close_session(session_id)
+            writer.close()
+
+    def request(self, connection, message):
+        """Apply one client request and return the reply, if any"""
+        if not isinstance(message, dict):
+            raise ValueError("Requests must be JSON objects")
+        op = message["op"]
+        if op == "new":
+            return self.new_session(connection, message)
+        if op == "click":
+            session = self.session(connection, message)
+            row, col = int(message["row"]), int(message["col"])
+            if not (0 <= row < session.engine.rows and 0 <= col < session.engine.cols):
+                raise ValueError(f"Cell ({row}, {col}) is off the board")
+            session.clicks.append((row, col))
+            return None
+        if op == "close":
+            self.close_session(self.session(connection, message).id)
+            return None
+        if op == "metrics":
+            return {"type": "metrics", **self.metrics()}
+        raise ValueError(f"Unknown op {op!r}")
+
+    def session(self, connection, message):
+        """Return the client's session a request refers to"""
+        session = connection.sessions.get(message["id"])
+        if session is None:
+            raise ValueError(f"No session {message['id']!r} on this connection")
+        return session
+
+    def new_session(self, connection, message):
+        rows = int(message.get("rows", GRID_ROWS))
+        cols = int(message.get("cols", GRID_COLS))
+        if rows * cols > MAX_BOARD_CELLS:
+            raise ValueError(f"Board of {rows}x{cols} is larger than {MAX_BOARD_CELLS} cells")
+        seed = message.get("seed")
+        engine = Engine(seed=new_seed() if seed is None else int(seed), rows=rows, cols=cols)
+        session = Session(self.next_id, connection, engine)
+        self.next_id += 1
+        self.sessions[session.id] = session
+        connection.sessions[session.id] = session
+        self.sessions_total += 1
+        self.started.append(time.perf_counter())
+        return {"type": "session", "id": session.id, "seed": engine.seed, "rows": rows, "cols": cols,
+                "board": list(session.board), "score": engine.score}
+
+    def close_session(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.connection.sessions.pop(session_id, None)
+
+    def tick(self):
+        """Advance every session by one tick and send each client its diffs"""
+        self.ticks += 1
+        finished = []
+        for session in self.sessions.values():
+            engine = session.engine
+            for row, col in session.clicks:
+                engine.click(row, col)
+            session.clicks.clear()
+            engine.update()
+
+            board = engine.board
+            if board == session.board and engine.score == session.score and not engine.game_over:
+                continue
+            old = session.board
+            cells = [[idx, value] for idx, value in enumerate(board) if value != old[idx]]
+            session.board = bytes(board)
+            session.score = engine.score
+            session.connection.updates.append([session.id, cells, engine.score, engine.game_over])
+            if engine.game_over:
+                finished.append(session.id)
+
+        for session_id in finished:
+            self.close_session(session_id)
+        self.games_finished += len(finished)
+
+        for connection in self.connections:
+            if not connection.updates:
+                continue
+            data = json.dumps({"type": "tick", "tick": self.ticks, "sessions": connection.updates},
+                              separators=(",", ":")).encode() + b"\n"
+            connection.updates = []
+            transport = connection.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_BUFFER:
+                transport.abort()
+                continue
+            connection.writer.write(data)
+            self.messages_sent += 1
+            self.bytes_sent += len(data)
+
+    async def run_ticks(self):
+        """Tick all sessions at a fixed rate, catching up on short stalls"""
+        perf_counter = time.perf_counter
+        next_tick = perf_counter()
+        while True:
+            start = perf_counter()
+            self.profiler.record("lag", max(0.0, start - next_tick))
+            self.tick()
+            self.profiler.record("tick", perf_counter() - start)
+            next_tick += self.tick_time
+            delay = next_tick - perf_counter()
+            if delay < -0.25:
+                # Too far behind to catch up; drop the backlog
+                next_tick = perf_counter()
+                delay = 0
+            await asyncio.sleep(max(0.0, delay))
+
+    def metrics(self):
+        now = time.perf_counter()
+        while self.started and self.started[0] < now - RATE_WINDOW:
+            self.started.popleft()
+        tick_p50, tick_p95, tick_p99 = self.profiler.percentiles("tick")
+        lag_p50, lag_p95, lag_p99 = self.profiler.percentiles("lag")
+        return {
+            "sessions": len(self.sessions),
+            "connections": len(self.connections),
+            "sessions_per_second": len(self.started) / RATE_WINDOW,
+            "sessions_total": self.sessions_total,
+            "games_finished": self.games_finished,
+            "ticks": self.ticks,
+            "tick_ms": {"p50": tick_p50 * 1000, "p95": tick_p95 * 1000, "p99": tick_p99 * 1000},
+            "lag_ms": {"p50": lag_p50 * 1000, "p95": lag_p95 * 1000, "p99": lag_p99 * 1000},
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+        }
+
+    async def serve(self, host, port, stats_interval=0):
+        server = await asyncio.start_server(self.handle, host, port)
+        ticker = asyncio.create_task(self.run_ticks())
+        print(f"Serving Fruit Merge on {host}:{port}")
+        try:
+            async with server:
+                if stats_interval:
+                    while True:
+                        await asyncio.sleep(stats_interval)
+                        print(json.dumps(self.metrics()))
+                else:
+                    await server.serve_forever()
+        finally:
+            ticker.cancel()
+
+async def load_client(host, port, sessions, duration, click_rate, rows, cols, seed, stats):
+    """Keep a number of sessions busy on one connection for duration seconds.
+
+    Every session clicks a random cell with chance click_rate per update
+    and a finished game is replaced by a new one right away.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+
+    def send(message):
+        writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    new = {"op": "new", "rows": rows, "cols": cols}
+    for _ in range(sessions):
+        send(dict(new, seed=rng.randrange(1 << 63)))
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                line = await asyncio.wait_for(reader.readline(), deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                break
+            stats["messages"] += 1
+            stats["bytes"] += len(line)
+            message = json.loads(line)
+            if message["type"] == "session":
+                stats["sessions"] += 1
+            elif message["type"] == "tick":
+                for session_id, cells, score, game_over in message["sessions"]:
+                    stats["diff_cells"] += len(cells)
+                    if game_over:
+                        stats["games"] += 1
+                        send(dict(new, seed=rng.randrange(1 << 63)))
+                    elif rng.random() < click_rate:
+                        send({"op": "click", "id": session_id,
+                              "row": rng.randrange(rows), "col": rng.randrange(cols)})
+            elif message["type"] == "error":
+                stats["errors"] += 1
+            await writer.drain()
+    finally:
+        writer.close()
+
+async def load(host, port, connections, sessions, duration, click_rate, rows, cols, seed):
+    """Run the load generator and return its counters and the server's metrics"""
+    stats = {"sessions": 0, "games": 0, "messages": 0, "bytes": 0, "diff_cells": 0, "errors": 0}
+    per_connection = [sessions // connections + (i < sessions % connections) for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(load_client(host, port, count, duration, click_rate, rows, cols,
+                                       seed + i, stats)
+                           for i, count in enumerate(per_connection)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op":"metrics"}\n')
+    metrics = json.loads(await reader.readline())
+    writer.close()
+    return stats, elapsed, metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Fruit Merge sessions over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--tick-rate", type=int, default=TICK_RATE)
+    serve.add_argument("--stats", type=float, default=0, metavar="SECONDS",
+                       help="print metrics every SECONDS")
+    generator = commands.add_parser("load", help="drive a running server with simulated players")
+    generator.add_argument("--host", default="127.0.0.1")
+    generator.add_argument("--port", type=int, default=8765)
+    generator.add_argument("--connections", type=int, default=10)
+    generator.add_argument("--sessions", type=int, default=100, help="concurrent sessions in total")
+    generator.add_argument("--duration", type=float, default=10, help="seconds to run")
+    generator.add_argument("--click-rate", type=float, default=0.05, help="chance of a click per update")
+    generator.add_argument("--rows", type=int, default=GRID_ROWS)
+    generator.add_argument("--cols", type=int, default=GRID_COLS)
+    generator.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(Server(args.tick_rate).serve(args.host, args.port, args.stats))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    stats, elapsed, metrics = asyncio.run(load(args.host, args.port, args.connections, args.sessions,
+                                               args.duration, args.click_rate, args.rows, args.cols,
+                                               args.seed))
+    print(f"{stats['sessions']} sessions started, {stats['games']} games finished in {elapsed:.1f}s "
+          f"({stats['sessions'] / elapsed:.1f} sessions/s)")
+    print(f"{stats['messages']} messages, {stats['bytes'] / elapsed / 1024:.0f} KiB/s, "
+          f"{stats['diff_cells']} changed cells, {stats['errors']} errors")
+    print(f"Server: {metrics['sessions']} sessions, {metrics['ticks']} ticks, "
+          f"tick p50 {metrics['tick_ms']['p50']:.2f} ms, p95 {metrics['tick_ms']['p95']:.2f} ms, "
+          f"lag p95 {metrics['lag_ms']['p95']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
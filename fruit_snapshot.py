@@ -0,0 +1,151 @@
+"""Binary snapshots of a Fruit Merge session, for autosave and resume.
+
+A snapshot is Engine.save_state() plus the session parameters, packed
+into about 2.6 KB plus one byte per cell; most of it is the 625-word
+Mersenne Twister state.
+
+File layout, all integers little-endian:
+
+    header  "FMSN", version u8, rows u16, cols u16, seed u64,
+            weight count u8, weights u16 each
+    state   ticks u64, score u64, next_fruit_timer u32, game_over u8,
+            merges u32 per fruit value (MAX_LEVEL + 1),
+            RNG version u8, 625 RNG words u32, gauss flag u8, gauss f64,
+            dirty count u32, dirty cells u32 each,
+            rows * cols board bytes
+
+Files are written to a temporary name and moved into place, so a crash
+mid-write leaves the previous snapshot intact.
+"""
+import os
+import struct
+import threading
+
+from fruit_engine import MAX_LEVEL, SPAWN_TYPES, Engine, normalize_seed
+
+MAGIC = b"FMSN"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHQB")
+STATE = struct.Struct(f"<QQIB{MAX_LEVEL + 1}IB625IBdI")
+AUTOSAVE_INTERVAL = 5.0  # Seconds
+
+class SnapshotError(Exception):
+    pass
+
+def dumps(engine):
+    """Return a binary snapshot of the engine"""
+    board, dirty, score, merges, ticks, timer, game_over, rng_state = engine.save_state()
+    rng_version, words, gauss = rng_state
+    data = bytearray(HEADER.pack(MAGIC, VERSION, engine.rows, engine.cols,
+                                 normalize_seed(engine.seed or 0), len(engine.weights)))
+    data += struct.pack(f"<{len(engine.weights)}H", *engine.weights)
+    data += STATE.pack(ticks, score, timer, game_over, *merges, rng_version, *words,
+                       gauss is not None, gauss or 0.0, len(dirty))
+    data += struct.pack(f"<{len(dirty)}I", *dirty)
+    data += board
+    return bytes(data)
+
+def loads(data):
+    """Return a new engine in the state of a binary snapshot.
+
+    Raises SnapshotError if the data is truncated or describes a state the
+    engine cannot be in.
+    """
+    try:
+        magic, version, rows, cols, seed, weight_count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise SnapshotError("Not a Fruit Merge snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+        if rows < 2 or cols < 1:
+            raise SnapshotError(f"Invalid board size {rows}x{cols}")
+        pos = HEADER.size
+        weights = list(struct.unpack_from(f"<{weight_count}H", data, pos))
+        pos += 2 * weight_count
+        fields = STATE.unpack_from(data, pos)
+        pos += STATE.size
+        ticks, score, timer, game_over = fields[:4]
+        merges = fields[4:MAX_LEVEL + 5]
+        rng_version = fields[MAX_LEVEL + 5]
+        words = fields[MAX_LEVEL + 6:MAX_LEVEL + 631]
+        has_gauss, gauss, dirty_count = fields[MAX_LEVEL + 631:]
+        dirty = struct.unpack_from(f"<{dirty_count}I", data, pos)
+        pos += 4 * dirty_count
+    except struct.error:
+        raise SnapshotError("Truncated snapshot")
+    board = bytes(data[pos:pos + rows * cols])
+    if len(board) != rows * cols:
+        raise SnapshotError("Truncated snapshot board")
+    if len(weights) != len(SPAWN_TYPES) or not any(weights):
+        raise SnapshotError(f"Invalid spawn weights {weights}")
+    if max(board) > MAX_LEVEL:
+        raise SnapshotError(f"Invalid fruit value {max(board)} on the board")
+    if any(idx >= rows * cols for idx in dirty):
+        raise SnapshotError("Dirty cell outside the board")
+
+    engine = Engine(seed=seed, weights=weights, rows=rows, cols=cols)
+    rng_state = (rng_version, words, gauss if has_gauss else None)
+    try:
+        engine.restore_state((board, dirty, score, merges, ticks, timer, bool(game_over), rng_state))
+    except ValueError as e:
+        raise SnapshotError(f"Invalid RNG state: {e}")
+    return engine
+
+def write_atomic(path, data):
+    """Replace the file at path with data, never leaving it half written"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def save(path, engine):
+    write_atomic(path, dumps(engine))
+
+def load(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+class Autosaver:
+    """Writes snapshots to one file on a background thread.
+
+    submit() only packs the engine state, which takes microseconds; the
+    write and fsync happen on the thread.  If snapshots come in faster than
+    the disk takes them, only the newest one is written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.closed = False
+        self.error = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="fruit-autosave", daemon=True)
+        self.thread.start()
+
+    def submit(self, engine):
+        data = dumps(engine)
+        with self.condition:
+            self.pending = data
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                data, self.pending = self.pending, None
+            try:
+                write_atomic(self.path, data)
+            except OSError as e:
+                self.error = e
+
+    def close(self):
+        """Write any pending snapshot and stop the thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
@@ -0,0 +1,171 @@
+"""Monte Carlo tournaments for Fruit Merge policies.
+
+Plays many seeded headless games with one policy, spawn weights and board
+size, sharded over a process pool, and summarizes score, game length and
+merges per fruit type.  Game i always gets the i-th seed derived from the
+master seed, so results do not depend on the number of workers:
+
+    python fruit_tournament.py --games 10000 --policy random
+    python fruit_tournament.py --games 200 --policy bot --depth 2 --rows 6 --cols 5
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fruit_bot import Bot, play
+from fruit_engine import GRID_COLS, GRID_ROWS, MAX_LEVEL, SPAWN_WEIGHTS, Engine, FruitType
+
+POLICIES = ("idle", "random", "greedy", "bot")
+
+class IdlePolicy:
+    """Never clicks; fruits just fall and merge where they land"""
+
+    def choose(self, engine):
+        return None
+
+class RandomPolicy:
+    """Clicks a random fruit once per spawn, from its own seeded RNG"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def choose(self, engine):
+        fruits = [idx for idx, value in enumerate(engine.board) if value]
+        if not fruits:
+            return None
+        return divmod(self.rng.choice(fruits), engine.cols)
+
+def make_policy(name, seed, depth):
+    """Return a fresh policy for one game.
+
+    The search policies get no time budget, only a fixed depth, so they
+    play the same way on any machine.
+    """
+    if name == "idle":
+        return IdlePolicy()
+    if name == "random":
+        return RandomPolicy(seed)
+    if name == "greedy":
+        return Bot(time_budget=float("inf"), max_depth=1)
+    if name == "bot":
+        return Bot(time_budget=float("inf"), max_depth=depth)
+    raise ValueError(f"Unknown policy {name!r}")
+
+def game_seeds(master_seed, games):
+    """Return the seed of every game, derived from the master seed"""
+    rng = random.Random(master_seed)
+    return [rng.randrange(1 << 63) for _ in range(games)]
+
+def play_chunk(games, policy, weights, rows, cols, max_ticks, depth):
+    """Play (index, seed) games in a worker and return one result per game"""
+    results = []
+    for index, seed in games:
+        engine = Engine(seed=seed, weights=weights, rows=rows, cols=cols)
+        play(make_policy(policy, seed, depth), engine, max_ticks)
+        results.append((index, engine.score, engine.ticks, engine.game_over, engine.merges[2:]))
+    return results
+
+def percentile(data, point):
+    """Nearest-rank percentile of sorted data"""
+    return data[min(len(data) - 1, len(data) * point // 100)]
+
+def summarize(values):
+    """Return mean and percentiles of a list of numbers"""
+    data = sorted(values)
+    stats = {"mean": sum(data) / len(data)}
+    for point in (5, 25, 50, 75, 95):
+        stats[f"p{point}"] = percentile(data, point)
+    stats["min"] = data[0]
+    stats["max"] = data[-1]
+    return stats
+
+class Tally:
+    """Aggregates per-game results as chunks arrive, in any order"""
+
+    def __init__(self, games):
+        self.scores = [0] * games
+        self.lengths = [0] * games
+        self.finished = 0
+        self.merges = [0] * (MAX_LEVEL + 1)
+        self.done = 0
+
+    def add(self, results):
+        for index, score, ticks, game_over, merges in results:
+            self.scores[index] = score
+            self.lengths[index] = ticks
+            self.finished += game_over
+            for value, count in enumerate(merges, 2):
+                self.merges[value] += count
+            self.done += 1
+
+    def summary(self):
+        return {
+            "games": self.done,
+            "finished": self.finished,
+            "score": summarize(self.scores),
+            "length": summarize(self.lengths),
+            "merges_per_game": {FruitType(value).name: self.merges[value] / self.done
+                                for value in range(2, MAX_LEVEL + 1)},
+        }
+
+def run(games, policy="random", seed=0, weights=SPAWN_WEIGHTS, rows=GRID_ROWS, cols=GRID_COLS,
+        max_ticks=100000, depth=2, workers=None, chunk_size=32, progress=None):
+    """Play a tournament and return its summary.
+
+    Games are submitted in chunks of chunk_size; progress, if given, is
+    called with the tally after every finished chunk.
+    """
+    seeds = game_seeds(seed, games)
+    tally = Tally(games)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for start in range(0, games, chunk_size):
+            chunk = list(enumerate(seeds[start:start + chunk_size], start))
+            futures.append(pool.submit(play_chunk, chunk, policy, weights, rows, cols, max_ticks, depth))
+        for future in as_completed(futures):
+            tally.add(future.result())
+            if progress is not None:
+                progress(tally)
+    return tally.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many Fruit Merge games with one policy")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--rows", type=int, default=GRID_ROWS)
+    parser.add_argument("--cols", type=int, default=GRID_COLS)
+    parser.add_argument("--weights", default=",".join(map(str, SPAWN_WEIGHTS)))
+    parser.add_argument("--max-ticks", type=int, default=100000, help="maximum ticks per game")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the bot policy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=32, help="games per task sent to a worker")
+    parser.add_argument("--json", metavar="FILE", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    weights = [int(w) for w in args.weights.split(",")]
+
+    def progress(tally):
+        print(f"\r{tally.done}/{args.games} games", end="", flush=True)
+
+    start = time.perf_counter()
+    summary = run(args.games, args.policy, args.seed, weights, args.rows, args.cols,
+                  args.max_ticks, args.depth, args.workers, args.chunk_size, progress)
+    elapsed = time.perf_counter() - start
+    print(f"\rGames: {summary['games']}, finished: {summary['finished']}, "
+          f"{args.workers} workers, {elapsed:.1f}s")
+    for name in ("score", "length"):
+        stats = summary[name]
+        print(f"{name:>6}: " + "  ".join(f"{key}={value:.1f}" for key, value in stats.items()))
+    print("merges per game: " + "  ".join(f"{name}={count:.2f}"
+                                          for name, count in summary["merges_per_game"].items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"policy": args.policy, "seed": args.seed, "weights": weights,
+                       "rows": args.rows, "cols": args.cols, **summary}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Tests that the batch simulator matches the scalar engine exactly."""
+import pytest
+
+pytest.importorskip("numpy")
+
+import fruit_batch
+from fruit_batch import verify
+
+@pytest.mark.parametrize("seed, rows, cols, move_rate, weights", [
+    (0, 5, 4, 0.0, [50, 30, 15, 4, 1]),
+    (1, 5, 4, 0.05, [50, 30, 15, 4, 1]),
+    (2, 8, 6, 0.1, [50, 30, 15, 4, 1]),
+    (3, 3, 7, 0.2, [10, 10, 10, 10, 60]),
+    (4, 2, 1, 0.5, [1, 1, 1, 1, 1]),
+])
+def test_batch_matches_scalar_engine(seed, rows, cols, move_rate, weights):
+    assert verify(games=40, max_ticks=3000, seed=seed, move_rate=move_rate, weights=weights,
+                  rows=rows, cols=cols)
+
+def test_verify_detects_divergence(monkeypatch):
+    # Spawn every fruit one column to the right in the scalar replay
+    choice = fruit_batch.ReplayRng.choice
+    monkeypatch.setattr(fruit_batch.ReplayRng, "choice",
+                        lambda self, seq: seq[(seq.index(choice(self, seq)) + 1) % len(seq)])
+    with pytest.raises(AssertionError):
+        verify(games=20, max_ticks=2000, seed=0)
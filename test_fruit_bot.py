@@ -0,0 +1,24 @@
+"""Tests for the bot's per-move time budget."""
+import time
+
+import pytest
+
+from fruit_bot import Bot, wait_for_turn
+from fruit_engine import Engine
+
+@pytest.mark.parametrize("rows, cols", [(5, 4), (16, 16)])
+def test_choose_stays_within_time_budget(rows, cols):
+    budget = 0.02
+    bot = Bot(time_budget=budget)
+    engine = Engine(seed=1, rows=rows, cols=cols)
+    worst = 0.0
+    for _ in range(20):
+        if engine.game_over:
+            break
+        start = time.perf_counter()
+        action = bot.choose(engine)
+        worst = max(worst, time.perf_counter() - start)
+        if action is not None:
+            engine.click(*action)
+        wait_for_turn(engine)
+    assert worst < budget * 5
@@ -0,0 +1,25 @@
+"""Tests for recording and verifying replays."""
+import pytest
+
+from fruit_engine import Engine
+from fruit_replay import Recorder, Replay, verify
+
+@pytest.mark.parametrize("seed", [-1, -(1 << 70), 1 << 64, (1 << 80) + 5])
+def test_out_of_range_seed_is_recorded_and_replayed(seed):
+    engine = Engine(seed=seed)
+    assert 0 <= engine.seed < 1 << 64
+    recorder = Recorder(engine)
+    engine.recorder = recorder
+    engine.advance(300)
+    engine.click(4, 0)
+    engine.advance(300)
+
+    replay = Replay.from_bytes(recorder.finish(engine))
+    assert replay.seed == engine.seed
+    assert verify(replay).score == engine.score
+
+def test_reset_normalizes_seed():
+    engine = Engine(seed=1)
+    engine.reset(-1)
+    assert engine.seed == (1 << 64) - 1
+    assert engine.rng.getstate() == Engine(seed=-1).rng.getstate()
@@ -0,0 +1,19 @@
+"""Tests for binary session snapshots."""
+import pytest
+
+from fruit_engine import Engine
+from fruit_snapshot import dumps, loads
+
+@pytest.mark.parametrize("seed", [-1, 1 << 64, (1 << 80) + 5])
+def test_out_of_range_seed_round_trips(seed):
+    engine = Engine(seed=seed)
+    engine.advance(500)
+    restored = loads(dumps(engine))
+    assert restored.seed == engine.seed
+    assert restored.board == engine.board
+    assert restored.rng.getstate() == engine.rng.getstate()
+
+def test_seed_set_after_creation_is_normalized():
+    engine = Engine(seed=1)
+    engine.seed = -1
+    assert loads(dumps(engine)).seed == (1 << 64) - 1
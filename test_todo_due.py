@@ -0,0 +1,61 @@
+"""Tes indeks batas waktu dan pengingat ToDoList."""
+import importlib.util
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from todo_columnar import ColumnarJournalStore
+from todo_storage import JournalStore, MemoryStore, SqliteStore
+
+TODO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "to do list.py")
+
+def load_todo():
+    spec = importlib.util.spec_from_file_location("todo_list", TODO_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+todo_list = load_todo()
+
+STORES = {
+    "memory": lambda path: MemoryStore(),
+    "journal": lambda path: JournalStore(str(path / "tasks.json")),
+    "columnar": lambda path: ColumnarJournalStore(str(path / "tasks.json")),
+    "sqlite": lambda path: SqliteStore(str(path / "tasks.db")),
+}
+
+@pytest.mark.parametrize("kind", STORES)
+def test_reminder_fetches_task_when_due(tmp_path, kind):
+    todo = todo_list.ToDoList(str(tmp_path / "tasks.json"), store=STORES[kind](tmp_path))
+    now = datetime.now()
+    todo.add_task("lewat", "", (now - timedelta(days=1)).isoformat(timespec="seconds"))
+    todo.add_task("nanti", "", (now + timedelta(days=1, seconds=1)).isoformat(timespec="seconds"))
+
+    fired = []
+    done = threading.Event()
+    def remind(task):
+        fired.append(task["title"])
+        done.set()
+    todo.start_reminders(remind, lead=timedelta(days=1))
+    todo.update_task(2, title="nanti diubah")
+    assert done.wait(5)
+    assert fired == ["nanti diubah"]
+    # Indeks hanya menyimpan batas waktu per id, bukan tugasnya
+    assert all(isinstance(due, datetime) for due in todo.due_index.due.values())
+    assert [task["title"] for task in todo.get_overdue_tasks(now)] == ["lewat"]
+    todo.close()
+
+@pytest.mark.parametrize("kind", STORES)
+def test_due_dates_follow_get_for_duplicate_ids(tmp_path, kind):
+    store = STORES[kind](tmp_path)
+    store.load()
+    task = {"id": 1, "title": "a", "description": "", "due_date": "2030-01-02",
+            "completed": True, "created_at": "2030-01-01 08:00:00"}
+    store.add(task)
+    store.add(dict(task, title="b", completed=False))
+    store.add(dict(task, id=2, title="c", completed=False, due_date="2030-01-03"))
+    store.add(dict(task, id=3, title="d", completed=False, due_date=""))
+    assert sorted(store.due_dates()) == [(2, "2030-01-03")]
+    store.close()
@@ -0,0 +1,138 @@
+"""Tes penyimpanan tugas: batch yang gagal, fsync log, pemadatan dan indeks pencarian."""
+import fcntl
+import importlib.util
+import json
+import os
+import time
+
+import pytest
+
+import todo_search
+import todo_storage
+from todo_columnar import ColumnarJournalStore
+from todo_storage import JournalStore, JsonStore
+
+TODO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "to do list.py")
+
+def load_todo():
+    spec = importlib.util.spec_from_file_location("todo_list", TODO_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+todo_list = load_todo()
+
+def lock_is_free(filename):
+    with open(filename + ".lock", "a") as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return True
+
+@pytest.mark.parametrize("store_class", [JsonStore, JournalStore, ColumnarJournalStore])
+def test_failed_commit_restores_tasks_and_releases_lock(tmp_path, store_class):
+    filename = str(tmp_path / "tasks.json")
+    todo = todo_list.ToDoList(filename, store=store_class(filename))
+    todo.add_task("lama", "sudah ada", "2030-01-01")
+    before = todo.store.all()
+    next_id = todo.store.next_id
+
+    def fail():
+        raise OSError("disk penuh")
+    todo.store._commit = fail
+    with pytest.raises(OSError, match="disk penuh"):
+        with todo.batch():
+            todo.add_task("baru")
+            todo.complete_task(before[0]["id"])
+            todo.update_task(before[0]["id"], title="diubah")
+    del todo.store._commit
+
+    assert todo.store.all() == before
+    assert todo.store.next_id == next_id
+    assert todo.store.undo is None
+    assert todo.store.lock_depth == 0
+    assert lock_is_free(filename)
+    assert todo.search("diubah") == []
+
+    # Perubahan berikutnya tetap tersimpan seperti biasa
+    todo.add_task("sesudah")
+    todo.close()
+    reopened = store_class(filename)
+    reopened.load()
+    assert [task["title"] for task in reopened.all()] == ["lama", "sesudah"]
+    reopened.close()
+
+def test_interval_fsync_happens_without_later_changes(tmp_path, monkeypatch):
+    filename = str(tmp_path / "tasks.json")
+    store = JournalStore(filename, fsync="interval", fsync_interval=0.2)
+    store.load()
+    synced = []
+    real_fsync = os.fsync
+    def fsync(fd):
+        synced.append(fd)
+        real_fsync(fd)
+    monkeypatch.setattr(todo_storage.os, "fsync", fsync)
+    store.last_fsync = time.monotonic()
+    store.add({"id": store.allocate_id(), "title": "satu-satunya", "description": "",
+               "due_date": "", "completed": False, "created_at": "2030-01-01 08:00:00"})
+    assert synced == []  # Interval belum habis
+    deadline = time.monotonic() + 2
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert synced == [store.log.fileno()]
+    store.close()
+
+def test_columnar_compaction_keeps_every_change(tmp_path):
+    filename = str(tmp_path / "tasks.json")
+    store = ColumnarJournalStore(filename, compact_every=3)
+    store.load()
+    for i in range(10):
+        store.add({"id": store.allocate_id(), "title": f"tugas {i}", "description": "",
+                   "due_date": "2030-01-01", "completed": False, "created_at": "2030-01-01 08:00:00"})
+    store.update(2, {"completed": True})
+    store.delete(5)
+    expected = store.all()
+    store.flush()
+    store.close()
+
+    assert not os.path.exists(filename + ".log.1")
+    reopened = JournalStore(filename)
+    reopened.load()
+    assert reopened.all() == expected
+    reopened.close()
+
+@pytest.mark.parametrize("content", [b"\x80\x04K\x01.", b"{}", b'{"version": 2, "fingerprint": [], "docs": 5}', b"[1, 2"])
+def test_malformed_search_index_is_rebuilt(tmp_path, content):
+    filename = str(tmp_path / "tasks.json")
+    todo = todo_list.ToDoList(filename, store=JsonStore(filename))
+    todo.add_task("beli susu", "di pasar", "2030-01-01")
+    assert [task["title"] for task in todo.search("susu")] == ["beli susu"]
+    todo.close()
+    with open(filename + ".idx", "rb") as f:
+        assert json.load(f)["version"] == todo_search.VERSION
+
+    with open(filename + ".idx", "wb") as f:
+        f.write(content)
+    todo = todo_list.ToDoList(filename, store=JsonStore(filename))
+    assert [task["title"] for task in todo.search("pasar")] == ["beli susu"]
+    todo.close()
+
+def test_inconsistent_search_index_is_rebuilt(tmp_path):
+    filename = str(tmp_path / "tasks.json")
+    todo = todo_list.ToDoList(filename, store=JsonStore(filename))
+    todo.add_task("beli susu", "di pasar", "2030-01-01")
+    todo.search("susu")
+    todo.close()
+    with open(filename + ".idx", encoding="utf-8") as f:
+        data = json.load(f)
+    data["docs"][0][1] = -1  # Masih JSON sah dengan sidik jari cocok, tetapi kata salah
+    with open(filename + ".idx", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    todo = todo_list.ToDoList(filename, store=JsonStore(filename))
+    assert todo.search_index is None
+    todo.update_task(1, title="beli kopi")
+    assert [task["title"] for task in todo.search("kopi")] == ["beli kopi"]
+    todo.close()
@@ -1,119 +1,347 @@
-import json
-from datetime import datetime
-import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+from todo_due import DueIndex, ReminderScheduler, as_datetime, parse_due_date
+from todo_search import SearchIndex
+from todo_storage import JournalStore, fingerprint
+
+PAGE_SIZE = 20  # Tugas per halaman di menu
+FILTERS = (None, "active", "completed")
 
 class ToDoList:
-    def __init__(self, filename="tasks.json"):
+    def __init__(self, filename="tasks.json", store=None):
         self.filename = filename
-        self.tasks = self.load_tasks()
+        self.store = store if store is not None else JournalStore(filename)
+        self.store.load()
+        self.silent = False  # True: jangan cetak pesan setiap perubahan
+        self.batch_depth = 0
+        self.search_filename = self.store.filename + ".idx"
+        self.search_index = None  # Dibangun saat pencarian pertama bila tidak ada di disk
+        if self.store.files():
+            self.store.flush()
+            # Di bawah kunci, agar tugas yang dimuat dan sidik jari file sama-sama
+            # sesudah perubahan terakhir oleh proses lain
+            with self.store.locked():
+                files = fingerprint(self.store.files())
+                if files:
+                    self.search_index = SearchIndex.load(self.search_filename, files)
+        self.due_index = None  # Diisi saat pertama dibutuhkan, atau oleh thread pengingat
+        self.reminders = None
+        self.generation = self.store.generation
+    
+    @property
+    def tasks(self):
+        """Semua tugas, urut sesuai waktu ditambahkan"""
+        self._sync()
+        return self.store.all()
+    
+    def _sync(self):
+        """Ikuti perubahan oleh proses lain; hanya memeriksa file, tidak membacanya ulang bila sama"""
+        self.store.refresh()
+        self._check_generation()
+    
+    def _check_generation(self):
+        """Bangun ulang indeks bila store memuat ulang tugas; kembalikan True bila begitu"""
+        if self.store.generation == self.generation:
+            return False
+        self.generation = self.store.generation
+        self._reset_indexes()
+        return True
     
     def load_tasks(self):
-        """Muat tugas dari file JSON"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        """Muat ulang tugas dari penyimpanan"""
+        self.store.load()
+        self.generation = self.store.generation
+        self._reset_indexes()
+        return self.tasks
     
     def save_tasks(self):
-        """Simpan tugas ke file JSON"""
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.tasks, f, indent=2, ensure_ascii=False)
+        """Simpan semua tugas sekaligus"""
+        with self.store.locked():
+            self.store.save(self.store.all())
+    
+    def close(self):
+        """Tutup penyimpanan dan selesaikan penulisan yang tertunda"""
+        if self.reminders is not None:
+            self.reminders.close()
+            self.reminders = None
+        if self.search_index is not None and self.store.files():
+            self.store.flush()
+            # Di bawah kunci, agar proses lain tidak mengubah file di antara
+            # pemeriksaan indeks dan sidik jari yang disimpan bersamanya
+            with self.store.locked():
+                self._sync()
+                if self.search_index is not None:
+                    self.search_index.save(self.search_filename, fingerprint(self.store.files()))
+        self.store.close()
+    
+    def _say(self, message):
+        if not self.silent:
+            print(message)
+    
+    @contextmanager
+    def batch(self, silent=True):
+        """Kumpulkan banyak perubahan lalu simpan sekali di akhir.
+        
+        Bila terjadi error di dalam blok atau saat menyimpan, semua
+        perubahan dibatalkan.  Batch di dalam batch ikut batch terluar.
+        """
+        previous = self.silent
+        self.silent = previous or silent
+        self.batch_depth += 1
+        if self.batch_depth == 1:
+            self.store.begin()
+            self._check_generation()
+        try:
+            yield self
+        except BaseException:
+            if self.batch_depth == 1:
+                self.store.rollback()
+                self._reset_indexes()
+            raise
+        else:
+            if self.batch_depth == 1:
+                try:
+                    self.store.commit()
+                except BaseException:
+                    # commit() sudah membatalkan batch-nya sendiri
+                    self._reset_indexes()
+                    raise
+        finally:
+            self.batch_depth -= 1
+            self.silent = previous
+    
+    def add_tasks(self, tasks):
+        """Tambah banyak tugas sekaligus dari dict (title, description, due_date)"""
+        with self.batch():
+            added = [self.add_task(**task) for task in tasks]
+        self._say(f"✓ {len(added)} tugas berhasil ditambahkan!")
+        return added
+    
+    def complete_tasks(self, task_ids):
+        """Tandai banyak tugas selesai sekaligus; kembalikan jumlahnya"""
+        with self.batch():
+            done = 0
+            for task_id in task_ids:
+                if self.store.update(task_id, {"completed": True}) is not None:
+                    self._reindex(task_id)
+                    done += 1
+        self._say(f"✓ {done} tugas ditandai selesai!")
+        return done
+    
+    def delete_tasks(self, task_ids):
+        """Hapus banyak tugas sekaligus; kembalikan jumlahnya"""
+        with self.batch():
+            deleted = 0
+            for task_id in task_ids:
+                if self.store.delete(task_id) is not None:
+                    self._reindex(task_id)
+                    deleted += 1
+        self._say(f"✓ {deleted} tugas berhasil dihapus!")
+        return deleted
     
     def add_task(self, title, description="", due_date=""):
         """Tambah tugas baru"""
-        task = {
-            "id": len(self.tasks) + 1,
-            "title": title,
-            "description": description,
-            "due_date": due_date,
-            "completed": False,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        self.tasks.append(task)
-        self.save_tasks()
-        print(f"✓ Tugas '{title}' berhasil ditambahkan!")
+        self._sync()
+        # id diambil dan tugas ditambahkan di bawah kunci yang sama, agar
+        # proses lain tidak memberikan id yang sama
+        with self.store.locked():
+            task = {
+                "id": self.store.allocate_id(),
+                "title": title,
+                "description": description,
+                "due_date": due_date,
+                "completed": False,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self.store.add(task)
+        self._reindex(task["id"])
+        self._say(f"✓ Tugas '{title}' berhasil ditambahkan!")
         return task
     
-    def list_tasks(self, show_completed=True):
-        """Tampilkan semua tugas"""
-        if not self.tasks:
-            print("📋 Belum ada tugas.")
-            return
+    def list_tasks(self, show_completed=True, page=None, page_size=PAGE_SIZE, filter=None):
+        """Tampilkan tugas; dengan page hanya satu halaman (mulai dari 1).
         
-        print("\n" + "="*70)
-        print(f"{'ID':<4} {'Status':<10} {'Judul':<20} {'Batas Waktu':<15} {'Deskripsi':<20}")
-        print("="*70)
+        filter None berarti semua tugas, atau "active" / "completed".
+        Setiap halaman ditulis ke layar sekaligus.  Kembalikan jumlah
+        halaman.
+        """
+        if filter is None and not show_completed:
+            filter = "active"
+        if filter not in FILTERS:
+            raise ValueError(f"filter harus salah satu dari {FILTERS}")
+        self._sync()
+        if not self.store.count():
+            print("📋 Belum ada tugas.")
+            return 0
         
-        for task in self.tasks:
-            if not show_completed and task["completed"]:
-                continue
-            
-            status = "✓ Selesai" if task["completed"] else "⧗ Aktif"
-            due_date = task.get("due_date", "-")
-            desc = task.get("description", "")[:20]
-            
-            print(f"{task['id']:<4} {status:<10} {task['title']:<20} {due_date:<15} {desc:<20}")
+        lines = ["", "="*70,
+                 f"{'ID':<4} {'Status':<10} {'Judul':<20} {'Batas Waktu':<15} {'Deskripsi':<20}",
+                 "="*70]
+        if page is not None:
+            tasks, total = self.store.page((page - 1) * page_size, page_size, filter)
+            pages = max(1, -(-total // page_size))
+            lines += [self._task_line(task) for task in tasks]
+            lines += ["="*70, f"Halaman {page}/{pages}, {total} tugas", ""]
+            sys.stdout.write("\n".join(lines) + "\n")
+            return pages
         
-        print("="*70 + "\n")
+        # Tugas dibaca bertahap per halaman, jadi tidak perlu dimuat sekaligus
+        tasks = self.store.each(filter)
+        shown = 0
+        while True:
+            chunk = [self._task_line(task) for task in islice(tasks, page_size)]
+            if not chunk:
+                break
+            shown += len(chunk)
+            lines += chunk
+            sys.stdout.write("\n".join(lines) + "\n")
+            lines = []
+        lines += ["="*70, ""]
+        sys.stdout.write("\n".join(lines) + "\n")
+        return max(1, -(-shown // page_size))
+    
+    def _task_line(self, task):
+        status = "✓ Selesai" if task["completed"] else "⧗ Aktif"
+        due_date = task.get("due_date", "-")
+        desc = task.get("description", "")[:20]
+        return f"{task['id']:<4} {status:<10} {task['title']:<20} {due_date:<15} {desc:<20}"
     
     def complete_task(self, task_id):
         """Tandai tugas sebagai selesai"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task["completed"] = True
-                self.save_tasks()
-                print(f"✓ Tugas '{task['title']}' ditandai selesai!")
-                return
-        print(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
+        self._sync()
+        task = self.store.update(task_id, {"completed": True})
+        if task is not None:
+            self._reindex(task_id)
+            self._say(f"✓ Tugas '{task['title']}' ditandai selesai!")
+            return
+        self._say(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
     
     def delete_task(self, task_id):
         """Hapus tugas"""
-        for i, task in enumerate(self.tasks):
-            if task["id"] == task_id:
-                title = task["title"]
-                self.tasks.pop(i)
-                self.save_tasks()
-                print(f"✓ Tugas '{title}' berhasil dihapus!")
-                return
-        print(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
+        self._sync()
+        task = self.store.delete(task_id)
+        if task is not None:
+            self._reindex(task_id)
+            self._say(f"✓ Tugas '{task['title']}' berhasil dihapus!")
+            return
+        self._say(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
     
     def update_task(self, task_id, **kwargs):
         """Edit tugas"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                for key, value in kwargs.items():
-                    if key in task:
-                        task[key] = value
-                self.save_tasks()
-                print(f"✓ Tugas '{task['title']}' berhasil diperbarui!")
-                return
-        print(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
+        self._sync()
+        task = self.store.get(task_id)
+        if task is not None:
+            fields = {key: value for key, value in kwargs.items() if key in task}
+            task = self.store.update(task_id, fields)
+            self._reindex(task_id, task["id"])
+            self._say(f"✓ Tugas '{task['title']}' berhasil diperbarui!")
+            return
+        self._say(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
     
     def view_task_details(self, task_id):
         """Lihat detail tugas"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                print("\n" + "="*50)
-                print(f"ID: {task['id']}")
-                print(f"Judul: {task['title']}")
-                print(f"Deskripsi: {task.get('description', '-')}")
-                print(f"Batas Waktu: {task.get('due_date', '-')}")
-                print(f"Status: {'✓ Selesai' if task['completed'] else '⧗ Aktif'}")
-                print(f"Dibuat: {task.get('created_at', '-')}")
-                print("="*50 + "\n")
-                return
+        self._sync()
+        task = self.store.get(task_id)
+        if task is not None:
+            print("\n" + "="*50)
+            print(f"ID: {task['id']}")
+            print(f"Judul: {task['title']}")
+            print(f"Deskripsi: {task.get('description', '-')}")
+            print(f"Batas Waktu: {task.get('due_date', '-')}")
+            print(f"Status: {'✓ Selesai' if task['completed'] else '⧗ Aktif'}")
+            print(f"Dibuat: {task.get('created_at', '-')}")
+            print("="*50 + "\n")
+            return
         print(f"✗ Tugas dengan ID {task_id} tidak ditemukan.")
     
+    def search(self, query, limit=20):
+        """Cari tugas yang judul atau deskripsinya memuat semua kata di query"""
+        self._sync()
+        if self.search_index is None:
+            self.search_index = SearchIndex.build(self.store.each())
+        tasks = (self.store.get(task_id) for task_id, score in self.search_index.search(query, limit))
+        return [task for task in tasks if task is not None]
+    
+    def _reindex(self, *task_ids):
+        """Samakan indeks pencarian dan batas waktu dengan tugas-tugas ber-id ini"""
+        if self._check_generation():
+            return
+        indexes = [index for index in (self.search_index, self.due_index) if index is not None]
+        if not indexes:
+            return
+        for task_id in task_ids:
+            task = self.store.get(task_id)
+            for index in indexes:
+                if task is None:
+                    index.discard(task_id)
+                else:
+                    index.set(task)
+    
+    def _reset_indexes(self):
+        """Buang indeks pencarian dan isi ulang indeks batas waktu setelah tugas berubah semua"""
+        self.search_index = None
+        if self.due_index is not None and self.due_index.built:
+            self.due_index.reset(self.store.due_dates())
+    
+    def _due(self):
+        self._sync()
+        if self.due_index is None:
+            self.due_index = DueIndex()
+        if not self.due_index.built:
+            self._fill_due_index()
+        return self.due_index
+    
+    def _fill_due_index(self):
+        """Isi indeks batas waktu bila belum; juga dipanggil dari thread pengingat.
+
+        Kunci store menahan thread lain selama pemindaian, jadi tugas tidak
+        berubah di tengah jalan dan indeks hanya diisi sekali.
+        """
+        with self.store.locked():
+            if not self.due_index.built:
+                self.due_index.reset(self.store.due_dates())
+    
+    def _get_tasks(self, task_ids):
+        tasks = (self.store.get(task_id) for task_id in task_ids)
+        return [task for task in tasks if task is not None]
+    
+    def get_overdue_tasks(self, now=None):
+        """Tugas aktif yang sudah lewat batas waktunya, paling lama dulu"""
+        return self._get_tasks(self._due().overdue(now or datetime.now()))
+    
+    def get_due_between(self, start, end):
+        """Tugas aktif dengan batas waktu di antara start dan end (tanggal atau datetime)"""
+        return self._get_tasks(self._due().between(as_datetime(start), as_datetime(end, end=True)))
+    
+    def get_next_due(self, count=5, now=None):
+        """count tugas aktif berikutnya yang belum lewat batas waktunya"""
+        return self._get_tasks(self._due().upcoming(now or datetime.now(), count))
+    
+    def start_reminders(self, callback, lead=timedelta(0)):
+        """Panggil callback(task) di thread latar setiap batas waktu tugas tiba.
+
+        Indeks batas waktu diisi di thread itu, jadi pemanggil tidak
+        menunggu semua tugas aktif dipindai.
+        """
+        if self.reminders is None:
+            if self.due_index is None:
+                self.due_index = DueIndex()
+            self.reminders = ReminderScheduler(self.due_index, self.store.get, callback, lead,
+                                               load=self._fill_due_index)
+        return self.reminders
+    
     def get_active_tasks(self):
         """Dapatkan tugas yang belum selesai"""
-        return [task for task in self.tasks if not task["completed"]]
+        self._sync()
+        return self.store.active()
     
     def get_completed_tasks(self):
         """Dapatkan tugas yang sudah selesai"""
-        return [task for task in self.tasks if task["completed"]]
+        self._sync()
+        return self.store.completed()
 
 
 def print_menu():
@@ -129,21 +357,39 @@ def print_menu():
     print("6. Lihat detail tugas")
     print("7. Lihat tugas aktif saja")
     print("8. Lihat tugas selesai saja")
-    print("9. Keluar")
+    print("9. Cari tugas")
+    print("10. Lihat tugas terlambat & mendatang")
+    print("11. Keluar")
     print("="*50)
 
 
 def main():
     """Fungsi utama aplikasi"""
-    todo = ToDoList()
+    try:
+        todo = ToDoList()
+    except ValueError as e:
+        print(f"✗ File tugas tidak bisa dibaca: {e}")
+        return
+    todo.start_reminders(lambda task: print(f"\n⏰ Pengingat: tugas '{task['title']}' sudah jatuh tempo!"))
     
     while True:
         print_menu()
-        choice = input("Pilih menu (1-9): ").strip()
+        choice = input("Pilih menu (1-11): ").strip()
         
         if choice == "1":
             print("\n📋 DAFTAR SEMUA TUGAS")
-            todo.list_tasks()
+            page = 1
+            while True:
+                pages = todo.list_tasks(page=page)
+                if pages <= 1:
+                    break
+                move = input("[n] berikutnya, [p] sebelumnya, lainnya kembali: ").strip().lower()
+                if move == "n":
+                    page = min(page + 1, pages)
+                elif move == "p":
+                    page = max(page - 1, 1)
+                else:
+                    break
         
         elif choice == "2":
             print("\n➕ TAMBAH TUGAS BARU")
@@ -151,13 +397,15 @@ def main():
             if title:
                 description = input("Deskripsi (opsional): ").strip()
                 due_date = input("Batas waktu (YYYY-MM-DD) (opsional): ").strip()
+                if due_date and parse_due_date(due_date) is None:
+                    print("⚠ Format batas waktu tidak dikenali, tugas ini tidak akan diingatkan.")
                 todo.add_task(title, description, due_date)
             else:
                 print("✗ Judul tugas tidak boleh kosong!")
         
         elif choice == "3":
             print("\n✓ TANDAI TUGAS SELESAI")
-            todo.list_tasks()
+            todo.list_tasks(page=1)
             try:
                 task_id = int(input("Masukkan ID tugas yang selesai: "))
                 todo.complete_task(task_id)
@@ -166,7 +414,7 @@ def main():
         
         elif choice == "4":
             print("\n🗑️  HAPUS TUGAS")
-            todo.list_tasks()
+            todo.list_tasks(page=1)
             try:
                 task_id = int(input("Masukkan ID tugas yang akan dihapus: "))
                 confirm = input("Yakin hapus? (y/n): ").strip().lower()
@@ -177,7 +425,7 @@ def main():
         
         elif choice == "5":
             print("\n✏️  EDIT TUGAS")
-            todo.list_tasks()
+            todo.list_tasks(page=1)
             try:
                 task_id = int(input("Masukkan ID tugas yang akan diedit: "))
                 print("Apa yang ingin diedit?")
@@ -195,6 +443,8 @@ def main():
                     todo.update_task(task_id, description=new_desc)
                 elif edit_choice == "3":
                     new_date = input("Batas waktu baru (YYYY-MM-DD): ").strip()
+                    if new_date and parse_due_date(new_date) is None:
+                        print("⚠ Format batas waktu tidak dikenali, tugas ini tidak akan diingatkan.")
                     todo.update_task(task_id, due_date=new_date)
                 else:
                     print("✗ Pilihan tidak valid!")
@@ -203,7 +453,7 @@ def main():
         
         elif choice == "6":
             print("\n🔍 DETAIL TUGAS")
-            todo.list_tasks()
+            todo.list_tasks(page=1)
             try:
                 task_id = int(input("Masukkan ID tugas: "))
                 todo.view_task_details(task_id)
@@ -231,7 +481,35 @@ def main():
                 print("Belum ada tugas yang selesai.")
         
         elif choice == "9":
+            print("\n🔎 CARI TUGAS")
+            query = input("Kata kunci: ").strip()
+            results = todo.search(query) if query else []
+            if results:
+                print(f"\nDitemukan {len(results)} tugas:\n")
+                for task in results:
+                    status = "✓" if task["completed"] else "⧗"
+                    print(f"[{task['id']}] {status} {task['title']} (Batas: {task.get('due_date', '-')})")
+            else:
+                print("✗ Tidak ada tugas yang cocok.")
+        
+        elif choice == "10":
+            print("\n⏰ TUGAS TERLAMBAT & MENDATANG")
+            overdue = todo.get_overdue_tasks()
+            upcoming = todo.get_next_due(PAGE_SIZE)
+            if overdue:
+                print(f"\nTerlambat ({len(overdue)}):")
+                for task in overdue[:PAGE_SIZE]:
+                    print(f"[{task['id']}] {task['title']} (Batas: {task['due_date']})")
+            if upcoming:
+                print("\nMendatang:")
+                for task in upcoming:
+                    print(f"[{task['id']}] {task['title']} (Batas: {task['due_date']})")
+            if not overdue and not upcoming:
+                print("Tidak ada tugas aktif dengan batas waktu.")
+        
+        elif choice == "11":
             print("\n👋 Terima kasih telah menggunakan Aplikasi To-Do List!")
+            todo.close()
             break
         
         else:
@@ -0,0 +1,517 @@
+"""Penyimpanan tugas yang hemat memori: kolom, bukan dict per tugas.
+
+Dict tugas biasa beserta enam string/bool di dalamnya memakan beberapa
+ratus byte per tugas, jadi jutaan tugas menghabiskan ratusan MB.
+ColumnarStore menyimpan setiap kolom dalam satu array:
+
+- id dan created_at (detik sejak 1970-01-01, jam setempat) di array int
+- completed dan penanda baris hidup sebagai bit, delapan tugas per byte
+- judul dan deskripsi sebagai UTF-8 berurutan di satu bytearray
+- due_date dipakai bersama: setiap teks disimpan sekali, baris hanya
+  menyimpan nomornya
+
+Dict tugas baru dibuat saat tugas diminta (get, page, each, ...), dan
+merupakan salinan: mengubahnya tidak mengubah store, seperti SqliteStore.
+Tugas yang tidak cocok dengan kolom-kolom itu (kolom tambahan, tipe lain,
+created_at dengan format lain) disimpan utuh apa adanya.
+
+Baris tidak pernah dipindah; baris tugas yang dihapus hanya ditandai
+mati.  Karena id tugas baru selalu naik, id dicari dengan bisect pada
+array id; bila ada id yang lebih kecil ditambahkan setelahnya (data
+lama), barulah dibuat dict id -> baris.
+
+ColumnarJsonStore dan ColumnarJournalStore memakai format file yang sama
+dengan JsonStore dan JournalStore.  Snapshot dibaca bertahap langsung ke
+kolom dan ditulis tugas demi tugas, jadi saat memuat maupun memadatkan
+log tidak ada daftar dict semua tugas:
+
+    ToDoList(store=ColumnarJournalStore("tasks.json"))
+    print(todo.store.bytes_per_task())
+"""
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+
+from todo_storage import (COLUMNS, JournalStore, JsonStore, MemoryStore, deep_size, fingerprint,
+                          read_log, read_seq, read_snapshot, replay, stream_snapshot,
+                          write_temp_snapshot)
+
+STREAM_SIZE = 16 << 20  # Snapshot sebesar ini ke atas dibaca bertahap, bukan dengan json.load
+SCAN_BYTES = 8192  # Byte bit yang diperiksa sekaligus saat memindai baris
+EPOCH = date(1970, 1, 1).toordinal()
+CREATED_AT = re.compile(r"(\d{4}-\d\d-\d\d) ([01]\d|2[0-3]):([0-5]\d):([0-5]\d)", re.ASCII)
+# Posisi bit yang menyala untuk setiap nilai byte
+BIT_POSITIONS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+@lru_cache(maxsize=4096)
+def _day_number(text):
+    try:
+        return date.fromisoformat(text).toordinal() - EPOCH
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=4096)
+def _day_text(days):
+    return date.fromordinal(days + EPOCH).isoformat()
+
+def _pack_created(text):
+    """"YYYY-MM-DD HH:MM:SS" menjadi detik sejak 1970, atau None bila formatnya lain"""
+    match = CREATED_AT.fullmatch(text) if type(text) is str else None
+    if match is None:
+        return None
+    day, hour, minute, second = match.groups()
+    days = _day_number(day)
+    if days is None:
+        return None
+    return days * 86400 + int(hour) * 3600 + int(minute) * 60 + int(second)
+
+def _unpack_created(seconds):
+    days, seconds = divmod(seconds, 86400)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return f"{_day_text(days)} {hour:02d}:{minute:02d}:{second:02d}"
+
+def _get_bit(bits, row):
+    return bits[row >> 3] >> (row & 7) & 1
+
+def _set_bit(bits, row, value):
+    if value:
+        bits[row >> 3] |= 1 << (row & 7)
+    else:
+        bits[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+class _TextColumn:
+    """Teks UTF-8 semua baris berurutan dalam satu bytearray.
+
+    Teks yang diubah ditimpa di tempat bila muat, atau ditambahkan di
+    ujung; bila lebih dari separuh data sudah tidak dipakai, data ditulis
+    ulang.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.starts = array('Q')
+        self.lengths = array('I')
+        self.garbage = 0  # Byte di data yang tidak dipakai baris mana pun
+
+    def __getitem__(self, row):
+        start = self.starts[row]
+        return self.data[start:start + self.lengths[row]].decode('utf-8')
+
+    def append(self, text):
+        encoded = text.encode('utf-8')
+        self.starts.append(len(self.data))
+        self.lengths.append(len(encoded))
+        self.data += encoded
+
+    def set(self, row, text):
+        encoded = text.encode('utf-8')
+        start, length = self.starts[row], self.lengths[row]
+        if len(encoded) <= length:
+            self.data[start:start + len(encoded)] = encoded
+        else:
+            self.starts[row] = len(self.data)
+            self.data += encoded
+        self.lengths[row] = len(encoded)
+        self.garbage += length - len(encoded) if len(encoded) <= length else length
+        self._maybe_compact()
+
+    def clear(self, row):
+        self.garbage += self.lengths[row]
+        self.lengths[row] = 0
+        self._maybe_compact()
+
+    def truncate(self, rows):
+        """Buang baris ke-rows dan seterusnya"""
+        if rows < len(self.starts):
+            self.garbage += sum(self.lengths[rows:])
+            del self.starts[rows:]
+            del self.lengths[rows:]
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.garbage > max(len(self.data) // 2, 1 << 16):
+            data = bytearray()
+            for row, (start, length) in enumerate(zip(self.starts, self.lengths)):
+                self.starts[row] = len(data)
+                data += self.data[start:start + length]
+            self.data = data
+            self.garbage = 0
+
+    def memory_usage(self):
+        return sum(sys.getsizeof(column) for column in (self.data, self.starts, self.lengths))
+
+class ColumnarStore(MemoryStore):
+    """Semua tugas di memori dalam kolom-kolom array; lihat docstring modul.
+
+    Nomor baris mulai dari 0 dan sama dengan posisi di setiap kolom.
+    last_row adalah jumlah baris, termasuk baris yang sudah mati.
+    """
+
+    # Atribut yang menyimpan isi store, disalin oleh _adopt()
+    STATE = ("ids", "created", "due_codes", "due_values", "due_lookup", "titles", "descriptions",
+             "alive", "done", "extras", "by_id", "duplicate_ids", "live", "live_done", "next_id")
+
+    def _index(self, tasks, next_id=1):
+        self.ids = array('q')
+        self.created = array('q')
+        self.due_codes = array('I')
+        self.due_values = [""]  # Nomor -> teks due_date
+        self.due_lookup = {"": 0}  # Teks due_date -> nomor
+        self.titles = _TextColumn()
+        self.descriptions = _TextColumn()
+        self.alive = bytearray()  # Bit per baris: tugas belum dihapus
+        self.done = bytearray()  # Bit per baris: tugas selesai
+        self.extras = {}  # Baris -> tugas utuh yang tidak cocok dengan kolom
+        self.by_id = None  # Id -> baris pertama, hanya bila ids tidak urut
+        self.duplicate_ids = set()
+        self.live = 0
+        self.live_done = 0
+        self.next_id = next_id
+        for task in tasks:
+            self._insert(task)
+
+    @property
+    def last_row(self):
+        return len(self.ids)
+
+    def _fits(self, task):
+        return (type(task) is dict and tuple(task) == COLUMNS and type(task["title"]) is str
+                and type(task["description"]) is str and type(task["due_date"]) is str
+                and type(task["completed"]) is bool)
+
+    def _insert(self, task):
+        row = len(self.ids)
+        task_id = task["id"]
+        if self.by_id is None and self.ids and task_id < self.ids[-1]:
+            self._map_ids()
+        self.ids.append(task_id)
+        if row & 7 == 0:
+            self.alive.append(0)
+            self.done.append(0)
+        created = _pack_created(task.get("created_at"))
+        if created is not None and self._fits(task):
+            # Jalur cepat untuk tugas biasa: langsung ke ujung setiap kolom
+            self.created.append(created)
+            self.due_codes.append(self._due_code(task["due_date"]))
+            self.titles.append(task["title"])
+            self.descriptions.append(task["description"])
+            _set_bit(self.alive, row, 1)
+            self.live += 1
+            if task["completed"]:
+                _set_bit(self.done, row, 1)
+                self.live_done += 1
+            self._map_row(row, task_id)
+        else:
+            self.created.append(0)
+            self.due_codes.append(0)
+            self.titles.append("")
+            self.descriptions.append("")
+            self._revive(row, task)
+        self.next_id = max(self.next_id, task_id + 1)
+        return row
+
+    def _map_ids(self):
+        """Beralih dari bisect ke dict id -> baris karena ids tidak urut lagi"""
+        self.by_id = {}
+        for row in self._rows():
+            task_id = self.ids[row]
+            if task_id in self.by_id:
+                self.duplicate_ids.add(task_id)
+            else:
+                self.by_id[task_id] = row
+
+    def _store(self, row, task):
+        """Tulis tugas ke kolom-kolom baris yang masih hidup"""
+        was_done = _get_bit(self.done, row)
+        completed = bool(task["completed"])
+        _set_bit(self.done, row, completed)
+        self.live_done += completed - was_done
+        due = task.get("due_date", "")
+        self.due_codes[row] = self._due_code(due) if type(due) is str else 0
+        created = _pack_created(task.get("created_at"))
+        if self._fits(task) and created is not None:
+            self.extras.pop(row, None)
+            self.titles.set(row, task["title"])
+            self.descriptions.set(row, task["description"])
+            self.created[row] = created
+        else:
+            self.extras[row] = dict(task)
+            self.titles.clear(row)
+            self.descriptions.clear(row)
+
+    def _due_code(self, due):
+        code = self.due_lookup.get(due)
+        if code is None:
+            code = self.due_lookup[due] = len(self.due_values)
+            self.due_values.append(sys.intern(due))
+        return code
+
+    def _revive(self, row, task):
+        """Hidupkan baris dengan isi tugas ini"""
+        _set_bit(self.alive, row, 1)
+        self.live += 1
+        self.ids[row] = task["id"]
+        self._store(row, task)
+        self._map_row(row, task["id"])
+
+    def _map_row(self, row, task_id):
+        if self.by_id is not None:
+            first = self.by_id.get(task_id)
+            if first is None:
+                self.by_id[task_id] = row
+            else:
+                self.duplicate_ids.add(task_id)
+                self.by_id[task_id] = min(first, row)
+
+    def _kill(self, row):
+        """Tandai baris mati dan lepaskan isinya"""
+        _set_bit(self.alive, row, 0)
+        self.live -= 1
+        if _get_bit(self.done, row):
+            _set_bit(self.done, row, 0)
+            self.live_done -= 1
+        self.titles.clear(row)
+        self.descriptions.clear(row)
+        self.extras.pop(row, None)
+        task_id = self.ids[row]
+        if self.by_id is not None and self.by_id.get(task_id) == row:
+            del self.by_id[task_id]
+            if task_id in self.duplicate_ids:
+                others = [other for other in self._rows() if self.ids[other] == task_id]
+                if others:
+                    self.by_id[task_id] = others[0]
+                if len(others) < 2:
+                    self.duplicate_ids.discard(task_id)
+
+    def _truncate(self, rows):
+        """Buang baris ke-rows dan seterusnya, yang semuanya sudah mati"""
+        for column in (self.ids, self.created, self.due_codes):
+            del column[rows:]
+        self.titles.truncate(rows)
+        self.descriptions.truncate(rows)
+        del self.alive[(rows + 7) >> 3:]
+        del self.done[(rows + 7) >> 3:]
+
+    def _find(self, task_id):
+        """Baris hidup pertama dengan id ini, atau None"""
+        if not isinstance(task_id, int):
+            return None
+        if self.by_id is not None:
+            return self.by_id.get(task_id)
+        row = bisect_left(self.ids, task_id)
+        while row < len(self.ids) and self.ids[row] == task_id:
+            if _get_bit(self.alive, row):
+                return row
+            row += 1
+        return None
+
+    def _task(self, row):
+        """Buat dict tugas dari kolom-kolom baris ini"""
+        extra = self.extras.get(row)
+        if extra is not None:
+            return dict(extra)
+        return {
+            "id": self.ids[row],
+            "title": self.titles[row],
+            "description": self.descriptions[row],
+            "due_date": self.due_values[self.due_codes[row]],
+            "completed": bool(_get_bit(self.done, row)),
+            "created_at": _unpack_created(self.created[row]),
+        }
+
+    def _rows(self, status=None, skip=0):
+        """Nomor baris hidup urut naik, setelah melewatkan skip baris pertama.
+
+        Bit baris diperiksa SCAN_BYTES byte sekaligus sebagai satu int,
+        sehingga potongan tanpa baris yang cocok dilewati dengan cepat.
+        """
+        for start in range(0, len(self.alive), SCAN_BYTES):
+            alive = self.alive[start:start + SCAN_BYTES]
+            if status is None:
+                chunk = alive
+            else:
+                mask = int.from_bytes(alive, 'little')
+                done = int.from_bytes(self.done[start:start + SCAN_BYTES], 'little')
+                mask &= done if status == "completed" else ~done
+                chunk = mask.to_bytes(len(alive), 'little')
+            if skip:
+                matched = int.from_bytes(chunk, 'little').bit_count()
+                if matched <= skip:
+                    skip -= matched
+                    continue
+            for i, value in enumerate(chunk):
+                if value:
+                    for bit in BIT_POSITIONS[value]:
+                        if skip:
+                            skip -= 1
+                            continue
+                        yield (start + i) * 8 + bit
+
+    def all(self):
+        return [self._task(row) for row in self._rows()]
+
+    def count(self):
+        return self.live
+
+    def each(self, status=None):
+        return map(self._task, self._rows(status))
+
+    def due_dates(self):
+        for row in self._rows("active"):
+            due = self.due_values[self.due_codes[row]]
+            if due and self._find(self.ids[row]) == row:
+                yield self.ids[row], due
+
+    def active(self):
+        return list(self.each("active"))
+
+    def completed(self):
+        return list(self.each("completed"))
+
+    def due_on(self, due_date):
+        code = self.due_lookup.get(due_date) if type(due_date) is str else None
+        return [self._task(row) for row in self._rows()
+                if (self.extras[row].get("due_date", "") == due_date if row in self.extras
+                    else self.due_codes[row] == code)]
+
+    def page(self, offset, limit, status=None):
+        total = {None: self.live, "active": self.live - self.live_done,
+                 "completed": self.live_done}[status]
+        return list(map(self._task, islice(self._rows(status, skip=offset), limit))), total
+
+    def get(self, task_id):
+        row = self._find(task_id)
+        return None if row is None else self._task(row)
+
+    def add(self, task):
+        with self.locked():
+            row = self._insert(task)
+            if self.undo is not None:
+                self.undo.append(("add", row, None))
+            self._added(task)
+
+    def update(self, task_id, fields):
+        with self.locked():
+            row = self._find(task_id)
+            if row is None:
+                return None
+            old = self._task(row)
+            if self.undo is not None:
+                self.undo.append(("update", row, old))
+            task = dict(old)
+            task.update(fields)
+            if task["id"] != task_id:
+                self._kill(row)
+                if self.by_id is None:
+                    self._map_ids()
+                self._revive(row, task)
+            else:
+                self._store(row, task)
+            self._updated(task_id, task, fields)
+            return task
+
+    def delete(self, task_id):
+        with self.locked():
+            row = self._find(task_id)
+            if row is None:
+                return None
+            task = self._task(row)
+            if self.undo is not None:
+                self.undo.append(("delete", row, task))
+            self._kill(row)
+            self._deleted(task)
+            return task
+
+    def _rollback(self):
+        undo, self.undo = self.undo, None
+        rows, next_id = self.undo_start
+        for op, row, task in reversed(undo):
+            if op == "add":
+                self._kill(row)
+            elif op == "update":
+                self._kill(row)
+                self._revive(row, task)
+            else:
+                self._revive(row, task)
+        self._truncate(rows)
+        self.next_id = next_id
+
+    def memory_usage(self):
+        columns = (self.ids, self.created, self.due_codes, self.alive, self.done)
+        return (sum(sys.getsizeof(column) for column in columns)
+                + self.titles.memory_usage() + self.descriptions.memory_usage()
+                + deep_size([self.due_values, self.due_lookup, self.extras, self.by_id, self.duplicate_ids]))
+
+    def _adopt(self, other):
+        """Ambil alih isi ColumnarStore lain"""
+        for name in self.STATE:
+            setattr(self, name, getattr(other, name))
+
+def _read_columns(filename):
+    """Baca snapshot ke ColumnarStore baru; kembalikan (store, seq).
+
+    Snapshot besar dibaca bertahap, agar dict semua tugas tidak pernah ada
+    di memori bersamaan; yang kecil lebih cepat dibaca sekaligus.
+    """
+    store = ColumnarStore()
+    if not os.path.exists(filename) or os.path.getsize(filename) < STREAM_SIZE:
+        snapshot = read_snapshot(filename)
+        store._index(snapshot["tasks"], snapshot["next_id"])
+        return store, snapshot["seq"]
+    header = {}
+    store._index(stream_snapshot(filename, header))
+    store.next_id = max(store.next_id, header.get("next_id", 1))
+    return store, header.get("seq", 0)
+
+class ColumnarJsonStore(JsonStore, ColumnarStore):
+    """JsonStore dengan tugas di memori disimpan sebagai kolom"""
+
+    def load(self):
+        """Muat semua tugas dari disk; kembalikan iterator, bukan daftar dict"""
+        self.seen = None
+        self.refresh()
+        return self.each()
+
+    def _reload(self):
+        store, self.seq = _read_columns(self.filename)
+        self._adopt(store)
+        self.seen = fingerprint(self.files())
+        self.seen_seq = read_seq(self.filename)
+
+class ColumnarJournalStore(JournalStore, ColumnarStore):
+    """JournalStore dengan tugas di memori disimpan sebagai kolom"""
+
+    def load(self):
+        """Muat snapshot lalu putar ulang log; kembalikan iterator, bukan daftar dict"""
+        self.close()
+        self.seen = None
+        self.refresh()
+        return self.each()
+
+    def _reload(self):
+        if self.log is not None:
+            self._close_log()
+        # Log diputar ulang ke store sementara: add() di store ini sendiri
+        # akan menulis ke log lagi
+        store, seq = _read_columns(self.filename)
+        seq = replay(store, read_log(self.old_log_filename), seq)
+        records = read_log(self.log_filename, truncate=True)
+        self.seq = replay(store, records, seq)
+        self._adopt(store)
+        self.records = len(records)
+        self.log = open(self.log_filename, 'ab')
+        self.seen = fingerprint(self.files())
+        if os.path.exists(self.old_log_filename):
+            self.compact()
+
+    def _merge_old_log(self):
+        """Seperti JournalStore, tetapi lewat ColumnarStore sementara dan ditulis bertahap"""
+        store, seq = _read_columns(self.filename)
+        seq = replay(store, read_log(self.old_log_filename), seq)
+        return write_temp_snapshot(self.filename, seq, store.next_id, store.each())
@@ -0,0 +1,227 @@
+"""Batas waktu tugas: indeks terurut dan pengingat.
+
+due_date tetap disimpan sebagai teks seperti yang diketik pengguna;
+parse_due_date mengubahnya sekali menjadi datetime saat tugas diindeks.
+Tanggal tanpa jam berlaku sampai akhir hari itu, jadi tugas untuk hari
+ini belum terlambat.  Teks yang bukan tanggal ISO diabaikan oleh indeks.
+
+DueIndex menyimpan (batas waktu, id) tugas aktif dalam daftar terurut,
+sehingga id tugas terlambat, tugas dalam rentang tanggal dan N tugas
+berikutnya didapat dengan bisect dalam O(log n + k); tugasnya sendiri
+diambil dari store.  ReminderScheduler tidur di thread latar sampai
+batas waktu terdekat, bukan memeriksa semua tugas berkala.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from itertools import islice, takewhile
+
+MAX_SLEEP = 3600.0  # Detik; bangun sesekali bila jam sistem diubah
+CHUNK_SIZE = 1000  # Isi setiap potongan _SortedList
+
+@lru_cache(maxsize=4096)
+def parse_due_date(text):
+    """Ubah "YYYY-MM-DD" atau "YYYY-MM-DD HH:MM" menjadi datetime, atau None"""
+    if not text or not text.strip():
+        return None
+    text = text.strip()
+    try:
+        return datetime.combine(date.fromisoformat(text), time.max)
+    except ValueError:
+        pass
+    try:
+        due = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if due.tzinfo is not None:
+        due = due.astimezone().replace(tzinfo=None)
+    return due
+
+def as_datetime(value, end=False):
+    """datetime dari datetime, date atau teks tanggal; tanggal saja menjadi awal
+    hari itu, atau akhirnya bila end=True"""
+    if isinstance(value, str):
+        try:
+            value = date.fromisoformat(value.strip())
+        except ValueError:
+            value = datetime.fromisoformat(value.strip())
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.max if end else time.min)
+
+class _SortedList:
+    """Daftar terurut yang dipecah menjadi potongan-potongan kecil.
+
+    Sisip dan hapus hanya menggeser satu potongan, bukan seluruh daftar
+    seperti insort pada satu list besar; maxes (isi terbesar tiap
+    potongan) menunjukkan potongan mana yang dituju.
+    """
+
+    def __init__(self, items=()):
+        items = sorted(items)
+        self.chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+
+    def add(self, item):
+        if not self.chunks:
+            self.chunks.append([item])
+            self.maxes.append(item)
+            return
+        i = min(bisect_left(self.maxes, item), len(self.maxes) - 1)
+        chunk = self.chunks[i]
+        insort(chunk, item)
+        self.maxes[i] = chunk[-1]
+        if len(chunk) > 2 * CHUNK_SIZE:
+            self.chunks[i:i + 1] = [chunk[:CHUNK_SIZE], chunk[CHUNK_SIZE:]]
+            self.maxes[i:i + 1] = [chunk[CHUNK_SIZE - 1], chunk[-1]]
+
+    def remove(self, item):
+        i = bisect_left(self.maxes, item)
+        chunk = self.chunks[i]
+        del chunk[bisect_left(chunk, item)]
+        if chunk:
+            self.maxes[i] = chunk[-1]
+        else:
+            del self.chunks[i]
+            del self.maxes[i]
+
+    def iter_from(self, key, after=False):
+        """Isi daftar mulai dari yang >= key (atau > key bila after=True)"""
+        find = bisect_right if after else bisect_left
+        i = find(self.maxes, key)
+        if i == len(self.chunks):
+            return
+        yield from islice(self.chunks[i], find(self.chunks[i], key), None)
+        for chunk in islice(self.chunks, i + 1, None):
+            yield from chunk
+
+class DueIndex:
+    """Id tugas aktif yang punya batas waktu, urut batas waktu.
+
+    Hanya (batas waktu, id) yang disimpan, bukan tugasnya.  Kuncinya id
+    tugas; untuk id ganda dari data lama, indeks mengikuti tugas yang
+    dikembalikan store.get(id).  Indeks baru kosong sampai reset() pertama
+    (built).  Semua akses lewat condition, karena ReminderScheduler
+    membacanya dari thread lain.
+    """
+
+    def __init__(self):
+        self.entries = _SortedList()  # (batas waktu, id)
+        self.due = {}  # id -> batas waktu
+        self.built = False
+        self.condition = threading.Condition()
+
+    @classmethod
+    def build(cls, due_dates):
+        index = cls()
+        index.reset(due_dates)
+        return index
+
+    def reset(self, due_dates):
+        """Ganti semua isi indeks dengan pasangan (id, due_date) tugas-tugas aktif"""
+        with self.condition:
+            self.due = {}
+            for task_id, text in due_dates:
+                due = parse_due_date(text)
+                if due is not None and task_id not in self.due:
+                    self.due[task_id] = due
+            self.entries = _SortedList((due, task_id) for task_id, due in self.due.items())
+            self.built = True
+            self.condition.notify_all()
+
+    def set(self, task):
+        """Indeks tugas, menggantikan isi lama dengan id yang sama"""
+        due = parse_due_date(task.get("due_date", ""))
+        with self.condition:
+            self._discard(task["id"])
+            if due is not None and not task["completed"]:
+                self.due[task["id"]] = due
+                self.entries.add((due, task["id"]))
+            self.condition.notify_all()
+
+    def discard(self, task_id):
+        """Keluarkan tugas dari indeks bila ada"""
+        with self.condition:
+            self._discard(task_id)
+
+    def _discard(self, task_id):
+        due = self.due.pop(task_id, None)
+        if due is not None:
+            self.entries.remove((due, task_id))
+
+    def overdue(self, now):
+        """Id tugas yang batas waktunya sudah lewat, paling lama dulu"""
+        with self.condition:
+            return [task_id for due, task_id in
+                    takewhile(lambda entry: entry[0] < now, self.entries.iter_from(()))]
+
+    def between(self, start, end):
+        """Id tugas dengan start <= batas waktu <= end"""
+        with self.condition:
+            return [task_id for due, task_id in
+                    takewhile(lambda entry: entry[0] <= end, self.entries.iter_from((start,)))]
+
+    def upcoming(self, now, count):
+        """Id count tugas berikutnya yang belum lewat batas waktunya"""
+        with self.condition:
+            return [task_id for due, task_id in islice(self.entries.iter_from((now,)), count)]
+
+    def next_after(self, cursor):
+        """(batas waktu, id) pertama sesudah cursor, atau None"""
+        for entry in self.entries.iter_from(cursor, after=True):
+            return entry
+        return None
+
+class ReminderScheduler:
+    """Thread yang memanggil callback(task) saat batas waktu tugas tiba.
+
+    Tugasnya diambil dengan get(id) saat pengingat berbunyi.  load, bila
+    ada, dipanggil lebih dulu di thread itu untuk mengisi indeks, agar
+    pemanggil tidak menunggu semua tugas dipindai.  lead memajukan
+    pengingat, misalnya timedelta(hours=1) untuk mengingatkan sejam
+    sebelumnya.  Tugas yang sudah terlambat saat scheduler mulai tidak
+    diingatkan.  Setiap perubahan indeks membangunkan thread agar
+    jadwalnya dihitung ulang.
+    """
+
+    def __init__(self, index, get, callback, lead=timedelta(0), clock=datetime.now, load=None):
+        self.index = index
+        self.get = get
+        self.callback = callback
+        self.load = load
+        self.lead = lead
+        self.clock = clock
+        self.cursor = (clock() + lead, float("inf"))  # Pengingat sampai sini sudah dikirim
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="todo-reminders", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        if self.load is not None:
+            self.load()
+        condition = self.index.condition
+        while True:
+            with condition:
+                if self.closed:
+                    return
+                entry = self.index.next_after(self.cursor)
+                if entry is None:
+                    condition.wait()
+                    continue
+                due, task_id = entry
+                wait = (due - self.lead - self.clock()).total_seconds()
+                if wait > 0:
+                    condition.wait(min(wait, MAX_SLEEP))
+                    continue
+                self.cursor = entry
+            task = self.get(task_id)
+            if task is not None:
+                self.callback(task)
+
+    def close(self):
+        """Hentikan thread pengingat"""
+        with self.index.condition:
+            self.closed = True
+            self.index.condition.notify_all()
+        self.thread.join()
@@ -0,0 +1,210 @@
+"""Pencarian teks penuh atas judul dan deskripsi tugas.
+
+SearchIndex adalah indeks terbalik: setiap kata (huruf kecil, lewat
+casefold) menunjuk ke id tugas yang memuatnya beserta bobotnya, dan
+daftar kata yang terurut membuat pencarian awalan kata cukup dengan
+bisect.  Indeks diperbarui per tugas, jadi tidak perlu dibangun ulang
+setiap ada perubahan.
+
+Indeks disimpan ke file JSON (misalnya tasks.json.idx) bersama sidik
+jari file data, yaitu ukuran dan waktu ubahnya.  Bila file data berubah
+tanpa indeks ikut disimpan, sidik jarinya tidak cocok lagi, dan bila
+file indeks rusak, indeks dibangun ulang dari tugas-tugasnya.  File itu
+hanya berisi data, bukan pickle, karena dibagi dengan proses dan
+pengguna lain.
+"""
+import gc
+import heapq
+import json
+import math
+import os
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from contextlib import contextmanager
+from itertools import chain
+
+VERSION = 2
+TITLE_WEIGHT = 3  # Kata di judul bernilai lebih daripada di deskripsi
+EXACT_BOOST = 2  # Kata yang sama persis bernilai lebih daripada awalan
+MAX_EXPANSIONS = 50  # Kata terbanyak yang dipakai untuk satu awalan
+
+WORD = re.compile(r"\w+")
+
+@contextmanager
+def _gc_paused():
+    """Matikan GC sementara; jutaan list dan dict tanpa siklus hanya memicunya sia-sia"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def tokenize(text):
+    """Pecah teks menjadi kata-kata huruf kecil"""
+    return WORD.findall(text.casefold())
+
+class SearchIndex:
+    """Indeks terbalik kata -> {id tugas: bobot}.
+
+    Kuncinya id tugas; untuk id ganda dari data lama, indeks mengikuti
+    tugas yang dikembalikan store.get(id).
+    """
+
+    def __init__(self):
+        self.postings = {}  # kata -> {id: bobot}
+        self.docs = {}  # id -> kata-kata tugas itu, untuk menghapusnya lagi
+        self.words = []  # Semua kata, terurut
+
+    @classmethod
+    def build(cls, tasks):
+        index = cls()
+        for task in tasks:
+            if task["id"] not in index.docs:
+                index._add(task)
+        index.words = sorted(index.postings)
+        return index
+
+    def set(self, task):
+        """Indeks tugas, menggantikan isi lama dengan id yang sama"""
+        self.discard(task["id"])
+        for word in self._add(task):
+            insort(self.words, word)
+
+    def _add(self, task):
+        """Tambahkan tugas ke postings; kembalikan kata-kata yang baru"""
+        new_words = []
+        weights = {}
+        for word in tokenize(task["title"]):
+            weights[word] = weights.get(word, 0) + TITLE_WEIGHT
+        for word in tokenize(task.get("description", "")):
+            weights[word] = weights.get(word, 0) + 1
+        task_id = task["id"]
+        for word, weight in weights.items():
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = {}
+                new_words.append(word)
+            postings[task_id] = weight
+        self.docs[task_id] = tuple(weights)
+        return new_words
+
+    def discard(self, task_id):
+        """Keluarkan tugas dari indeks bila ada"""
+        for word in self.docs.pop(task_id, ()):
+            postings = self.postings[word]
+            del postings[task_id]
+            if not postings:
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+
+    def _expand(self, term):
+        """Kata-kata di indeks yang berawalan term.
+
+        Awalan pendek bisa cocok dengan ribuan kata; yang dipakai hanya
+        MAX_EXPANSIONS kata terpendek, yang paling mirip dengan term.
+        """
+        start = bisect_left(self.words, term)
+        end = bisect_left(self.words, term + "\U0010ffff", start)
+        words = self.words[start:end]
+        if len(words) > MAX_EXPANSIONS:
+            words = heapq.nsmallest(MAX_EXPANSIONS, words, key=len)
+        return words
+
+    def search(self, query, limit=20):
+        """Kembalikan (id, skor) terbaik yang memuat semua kata di query.
+
+        Setiap kata di query cocok dengan kata yang sama persis atau yang
+        berawalan kata itu.  Skor menjumlahkan bobot kata dikali idf, jadi
+        kata yang jarang lebih menentukan.  Kata dengan calon paling
+        sedikit diproses lebih dulu, kata berikutnya hanya memeriksa
+        calon yang tersisa.
+        """
+        terms = []
+        for term in set(tokenize(query)):
+            words = self._expand(term)
+            if not words:
+                return []
+            size = sum(len(self.postings[word]) for word in words)
+            terms.append((size, term, words))
+        if not terms:
+            return []
+        terms.sort()
+
+        scores = None
+        for size, term, words in terms:
+            weighted = [(self.postings[word], self._idf(word) * (EXACT_BOOST if word == term else 1))
+                        for word in words]
+            if scores is None:
+                scores = {}
+                for postings, factor in weighted:
+                    for task_id, weight in postings.items():
+                        scores[task_id] = scores.get(task_id, 0) + weight * factor
+                continue
+            matched = {}
+            if len(scores) * len(weighted) <= size:
+                for task_id, score in scores.items():
+                    extra = sum(postings.get(task_id, 0) * factor for postings, factor in weighted)
+                    if extra:
+                        matched[task_id] = score + extra
+            else:
+                for postings, factor in weighted:
+                    for task_id, weight in postings.items():
+                        if task_id in scores:
+                            matched[task_id] = matched.get(task_id, scores[task_id]) + weight * factor
+            scores = matched
+            if not scores:
+                return []
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _idf(self, word):
+        return math.log(1 + len(self.docs) / len(self.postings[word]))
+
+    @classmethod
+    def load(cls, filename, fingerprint):
+        """Muat indeks dari file, atau None bila tidak ada, rusak atau sudah basi"""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f, _gc_paused():
+                data = json.load(f)
+                if data["version"] != VERSION or data["fingerprint"] != json.loads(json.dumps(fingerprint)):
+                    return None
+                index = cls()
+                for word, (ids, weights) in data["postings"].items():
+                    if not set(map(type, weights)) <= {int}:
+                        return None
+                    index.postings[word] = dict(zip(ids, weights, strict=True))
+                words = list(index.postings)
+                index.docs = {row[0]: tuple(map(words.__getitem__, row[1:])) for row in data["docs"]}
+        except (OSError, ValueError, TypeError, KeyError, IndexError):
+            return None
+        index.words = sorted(words)
+        # File yang diubah tangan bisa saja berupa JSON sah tetapi tidak cocok
+        if (index.words != words or len(index.docs) != len(data["docs"])
+                or Counter(chain.from_iterable(index.docs.values()))
+                != {word: len(postings) for word, postings in index.postings.items()}):
+            return None
+        return index
+
+    def save(self, filename, fingerprint):
+        """Simpan indeks beserta sidik jari file data saat ini.
+
+        Setiap kata menyimpan id dan bobot tugasnya sebagai dua array, dan
+        setiap tugas nomor kata-katanya di daftar kata yang terurut.
+        """
+        with _gc_paused():
+            position = {word: i for i, word in enumerate(self.words)}
+            data = {
+                "version": VERSION,
+                "fingerprint": fingerprint,
+                "postings": {word: [list(self.postings[word]), list(self.postings[word].values())]
+                             for word in self.words},
+                "docs": [[task_id, *map(position.__getitem__, words)] for task_id, words in self.docs.items()],
+            }
+            text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        del data
+        tmp = f"{filename}.{os.getpid()}.tmp"  # Proses lain boleh menyimpan bersamaan
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, filename)
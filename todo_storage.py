@@ -0,0 +1,1107 @@
+"""Penyimpanan tugas untuk ToDoList.
+
+JsonStore menulis ulang seluruh tasks.json setiap ada perubahan, sama
+seperti versi awal aplikasi.  JournalStore hanya menambahkan satu baris
+ke log (tasks.json.log) per perubahan, lalu sesekali memadatkan log itu
+ke tasks.json di thread latar belakang, sehingga biaya per perubahan
+tidak bergantung pada jumlah tugas.
+
+Format snapshot JsonStore dan JournalStore:
+
+    {"seq": 42, "next_id": 108, "tasks": [...]}
+
+Daftar tugas biasa dari versi lama juga diterima.  next_id adalah id
+berikutnya yang akan dipakai, sehingga id tugas yang dihapus tidak pernah
+dipakai lagi.
+
+Setiap baris log adalah satu objek JSON dengan nomor urut "seq":
+
+    {"seq": 43, "op": "add", "task": {...}}
+    {"seq": 44, "op": "update", "id": 7, "fields": {"completed": true}}
+    {"seq": 45, "op": "delete", "id": 7}
+    {"seq": 46, "op": "batch", "records": [{"op": "add", ...}, ...]}
+
+Perubahan dalam satu batch (begin() ... commit()) ditulis sebagai satu
+catatan "batch", sehingga batch yang terpotong saat crash tidak pernah
+diputar ulang sebagian.
+
+Saat dimuat, catatan dengan seq lebih besar dari seq snapshot diputar
+ulang, jadi pemadatan yang terputus di tengah jalan tidak merusak data.
+
+Beberapa proses boleh memakai file yang sama.  Setiap perubahan memegang
+kunci flock pada tasks.json.lock, dan bila file diubah proses lain sejak
+terakhir dibaca, tugas dimuat ulang dulu sebelum perubahan diterapkan,
+jadi tidak ada perubahan yang hilang.  Pembaca cukup membandingkan
+ukuran, waktu ubah dan inode file (serta seq di awal tasks.json untuk
+JsonStore) dan hanya memuat ulang bila ada yang berubah.  File ditulis
+lewat file sementara lalu diganti, jadi tidak pernah setengah jadi; file
+yang rusak menimbulkan ValueError, bukan dianggap daftar kosong.
+
+SqliteStore menyimpan tugas di database SQLite (mode WAL) dan hanya
+membaca tugas yang diminta, sehingga aplikasi tidak perlu memuat semua
+tugas ke memori saat mulai, dan daftar tugas bisa dibaca per halaman.
+tasks.json yang sudah ada diimpor sekali dalam satu transaksi, dibaca
+bertahap sehingga file berukuran besar pun tidak dimuat sekaligus:
+
+    ToDoList(store=SqliteStore("tasks.db", import_from="tasks.json"))
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa kunci antarproses
+    fcntl = None
+
+FSYNC_POLICIES = ("always", "interval", "never")
+READ_CHUNK = 1 << 16  # Karakter per pembacaan saat mengurai snapshot
+SEQ_HEADER = re.compile(rb'\s*\{\s*"seq":\s*(\d+)')
+
+class _JsonReader:
+    """Pengurai JSON bertahap: membaca file per potongan, bukan sekaligus"""
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(READ_CHUNK)
+        if chunk:
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+        else:
+            self.eof = True
+
+    def peek(self):
+        """Karakter berikutnya selain spasi, atau "" di akhir file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Diharapkan {char!r} di snapshot")
+        self.pos += 1
+
+    def value(self):
+        """Urai satu nilai JSON utuh"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Angka di ujung potongan mungkin masih berlanjut
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self):
+        """Urai array satu elemen demi satu elemen"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+
+def stream_snapshot(filename, header):
+    """Hasilkan tugas-tugas snapshot satu per satu tanpa membaca seluruh file.
+
+    Kunci lain ("seq", "next_id") diisikan ke header; header baru lengkap
+    setelah semua tugas dihasilkan.  Lebih lambat daripada read_snapshot,
+    jadi hanya dipakai bila tugas-tugasnya tidak disimpan di memori.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        reader = _JsonReader(f)
+        if reader.peek() == "[":
+            yield from _checked(filename, reader.items())
+            return
+        reader.expect("{")
+        first = True
+        has_tasks = False
+        while reader.peek() != "}":
+            if not first:
+                reader.expect(",")
+            first = False
+            key = reader.value()
+            reader.expect(":")
+            if key == "tasks":
+                has_tasks = True
+                yield from _checked(filename, reader.items())
+            else:
+                header[key] = reader.value()
+        if not has_tasks:
+            raise ValueError(f"{filename} bukan file tugas")
+
+def _checked(filename, tasks):
+    for task in tasks:
+        if not isinstance(task, dict) or "id" not in task:
+            raise ValueError(f"{filename} bukan file tugas")
+        yield task
+
+def read_snapshot(filename):
+    """Baca snapshot sebagai {"seq", "next_id", "tasks"}"""
+    if not os.path.exists(filename):
+        return {"seq": 0, "next_id": 1, "tasks": []}
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"tasks": data}
+    if (not isinstance(data, dict) or not isinstance(data.get("tasks"), list)
+            or not all(isinstance(task, dict) and "id" in task for task in data["tasks"])):
+        raise ValueError(f"{filename} bukan file tugas")
+    data.setdefault("seq", 0)
+    data.setdefault("next_id", max([task["id"] for task in data["tasks"]], default=0) + 1)
+    return data
+
+def read_seq(filename):
+    """seq di awal snapshot tanpa membaca seluruh file, atau None"""
+    try:
+        with open(filename, 'rb') as f:
+            match = SEQ_HEADER.match(f.read(64))
+    except FileNotFoundError:
+        return None
+    return int(match.group(1)) if match else None
+
+def fingerprint(filenames):
+    """Ukuran, waktu ubah dan inode file-file yang ada, untuk mengenali perubahan.
+
+    File kosong dianggap tidak ada: log atau WAL yang kosong sama saja
+    dengan yang sudah dihapus.
+    """
+    result = []
+    for filename in filenames:
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            continue
+        if stat.st_size == 0:
+            continue
+        result.append((filename, stat.st_size, stat.st_mtime_ns, stat.st_ino))
+    return tuple(result)
+
+def acquire_lock(filename):
+    """Buka file kunci dan tunggu kunci eksklusifnya; tutup file untuk melepas"""
+    handle = open(filename, 'a')
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    return handle
+
+def write_temp(filename, text):
+    """Tulis teks ke file sementara di sebelah filename dan kembalikan namanya"""
+    return _write_temp_parts(filename, [text])
+
+def write_temp_snapshot(filename, seq, next_id, tasks):
+    """Tulis snapshot ke file sementara tugas demi tugas dan kembalikan namanya.
+
+    Hasilnya sama dengan json.dumps snapshot utuh, tetapi teks seluruh
+    snapshot (dan daftar semua tugas) tidak pernah ada di memori.
+    """
+    def parts():
+        yield f'{{"seq": {seq}, "next_id": {next_id}, "tasks": ['
+        for i, task in enumerate(tasks):
+            yield (", " if i else "") + json.dumps(task, ensure_ascii=False)
+        yield "]}"
+    return _write_temp_parts(filename, parts())
+
+def _write_temp_parts(filename, parts):
+    tmp = f"{filename}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.writelines(parts)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+def write_atomic(filename, text):
+    """Tulis file lewat file sementara lalu ganti, agar tidak pernah setengah jadi"""
+    os.replace(write_temp(filename, text), filename)
+
+def changes(record):
+    """Perubahan dalam satu catatan log; catatan batch berisi banyak"""
+    return record["records"] if record["op"] == "batch" else [record]
+
+def replay(store, records, seq):
+    """Terapkan catatan dengan seq lebih besar dari seq ke store; kembalikan seq terakhir"""
+    for record in records:
+        if record["seq"] <= seq:
+            continue
+        seq = record["seq"]
+        for change in changes(record):
+            op = change["op"]
+            if op == "add":
+                store.add(change["task"])
+            elif op == "update":
+                store.update(change["id"], change["fields"])
+            elif op == "delete":
+                store.delete(change["id"])
+    return seq
+
+def apply_records(snapshot, records):
+    """Terapkan catatan log yang lebih baru dari snapshot ke snapshot itu"""
+    store = MemoryStore()
+    store._index(snapshot["tasks"], snapshot["next_id"])
+    snapshot["seq"] = replay(store, records, snapshot["seq"])
+    snapshot["tasks"] = store.all()
+    snapshot["next_id"] = store.next_id
+    return snapshot
+
+def read_log(filename, truncate=False):
+    """Baca catatan dari file log.
+
+    Baris terakhir yang terpotong (misalnya karena crash saat menulis)
+    diabaikan; dengan truncate=True baris itu juga dibuang dari file.
+    """
+    records = []
+    if not os.path.exists(filename):
+        return records
+    pos = 0
+    with open(filename, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            pos += len(line)
+        torn = f.tell() > pos
+    if truncate and torn:
+        with open(filename, 'r+b') as f:
+            f.truncate(pos)
+    return records
+
+def deep_size(obj, seen=None):
+    """Perkiraan byte memori obj beserta isi dict/list/set/tuple di dalamnya"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+class MemoryStore:
+    """Semua tugas di memori saja; dasar dari penyimpanan berbasis file.
+
+    Setiap tugas mendapat nomor baris internal yang naik terus; rows
+    memetakan nomor baris ke tugas dalam urutan tambah, dan indeks di
+    atasnya membuat pencarian, tambah, ubah dan hapus satu tugas O(1):
+
+    - by_id: id -> baris tugas pertama dengan id itu
+    - active_rows / completed_rows: baris per status selesai
+    - by_due: due_date -> baris dengan batas waktu itu
+
+    Di antara begin() dan commit() perubahan hanya dicatat di log undo
+    dan disimpan sekali saat commit(); rollback() membatalkan semuanya.
+
+    Store berbasis file memegang kunci antarproses selama setiap perubahan
+    dan selama batch (lock() / unlock()), dan memuat ulang tugas lebih dulu
+    bila proses lain mengubah filenya.  Kunci yang sama juga menahan thread
+    lain dalam proses ini, seperti thread pengingat yang membaca store.  generation naik setiap kali tugas
+    dimuat ulang, agar pemakai tahu indeksnya sendiri perlu dibangun ulang.
+    """
+
+    def __init__(self, filename="tasks.json"):
+        self.filename = filename
+        self.undo = None  # Log undo selama batch berjalan, None di luar batch
+        self.lock_handle = None
+        self.lock_depth = 0
+        self.thread_lock = threading.RLock()
+        self.seen = None  # Sidik jari file saat terakhir dibaca atau ditulis
+        self.generation = 0
+        self._index([])
+
+    def load(self):
+        """Muat semua tugas dari disk"""
+        return self.all()
+
+    def save(self, tasks):
+        """Ganti semua tugas dan simpan sekaligus"""
+        with self.locked():
+            self._index(tasks, self.next_id)
+            self._write()
+
+    def _write(self):
+        """Tulis semua tugas ke disk"""
+
+    def files(self):
+        """File yang menyimpan tugas-tugas ini"""
+        return []
+
+    def lock(self):
+        """Kunci file dari proses lain; muat ulang dulu bila proses lain mengubahnya.
+
+        Boleh bersarang; kunci baru dilepas oleh unlock() terluar.
+        """
+        self.thread_lock.acquire()
+        try:
+            if self.lock_depth == 0 and self.files():
+                self.lock_handle = acquire_lock(self.filename + ".lock")
+                try:
+                    if self._changed():
+                        self._reload()
+                        self.generation += 1
+                except BaseException:
+                    self.lock_handle.close()
+                    raise
+        except BaseException:
+            self.thread_lock.release()
+            raise
+        self.lock_depth += 1
+
+    def unlock(self):
+        try:
+            self.lock_depth -= 1
+            if self.lock_depth == 0 and self.lock_handle is not None:
+                self.lock_handle.close()
+                self.lock_handle = None
+        finally:
+            self.thread_lock.release()
+
+    @contextmanager
+    def locked(self):
+        self.lock()
+        try:
+            yield
+        finally:
+            self.unlock()
+
+    def refresh(self):
+        """Muat ulang bila file berubah sejak terakhir dibaca atau ditulis"""
+        if self.lock_depth == 0 and self.files() and self._changed():
+            self.lock()
+            self.unlock()
+
+    def _changed(self):
+        return fingerprint(self.files()) != self.seen
+
+    def _reload(self):
+        """Baca ulang tugas dari file (kunci sudah dipegang)"""
+
+    def begin(self):
+        """Mulai batch: perubahan berikutnya baru disimpan saat commit()"""
+        if self.undo is not None:
+            raise RuntimeError("Batch sudah berjalan")
+        self.lock()
+        self.undo = []
+        self.undo_start = (self.last_row, self.next_id)
+
+    def commit(self):
+        """Simpan semua perubahan dalam batch sekaligus.
+
+        Bila penyimpanan gagal, batch dibatalkan seperti rollback() dan
+        errornya diteruskan.
+        """
+        try:
+            try:
+                self._commit()
+            except BaseException:
+                self._rollback()
+                raise
+            self.undo = None
+        finally:
+            self.unlock()
+
+    def _commit(self):
+        self._write()
+
+    def rollback(self):
+        """Batalkan semua perubahan dalam batch"""
+        try:
+            self._rollback()
+        finally:
+            self.unlock()
+
+    def _rollback(self):
+        undo, self.undo = self.undo, None
+        reordered = False
+        for op, row, task, old in reversed(undo):
+            if op == "add":
+                self._unindex_row(row, task)
+                del self.rows[row]
+            elif op == "update":
+                self._unindex_row(row, task)
+                task.clear()
+                task.update(old)
+                self._index_row(row, task)
+            else:
+                self.rows[row] = task
+                self._index_row(row, task)
+                reordered = True
+        if reordered:
+            self.rows = dict(sorted(self.rows.items()))
+        self.last_row, self.next_id = self.undo_start
+
+    def _index(self, tasks, next_id=1):
+        """Bangun ulang semua indeks dari daftar tugas"""
+        self.rows = {}
+        self.by_id = {}
+        self.duplicate_ids = set()  # Id yang dipakai lebih dari satu tugas (data lama)
+        self.active_rows = set()
+        self.completed_rows = set()
+        self.by_due = {}
+        self.last_row = 0
+        self.next_id = next_id
+        for task in tasks:
+            self._insert(task)
+
+    def _insert(self, task):
+        self.last_row += 1
+        self.rows[self.last_row] = task
+        self._index_row(self.last_row, task)
+        self.next_id = max(self.next_id, task["id"] + 1)
+
+    def _index_row(self, row, task):
+        first = self.by_id.get(task["id"])
+        if first is None:
+            self.by_id[task["id"]] = row
+        else:
+            self.duplicate_ids.add(task["id"])
+            self.by_id[task["id"]] = min(first, row)
+        (self.completed_rows if task["completed"] else self.active_rows).add(row)
+        self.by_due.setdefault(task.get("due_date", ""), set()).add(row)
+
+    def _unindex_row(self, row, task):
+        task_id = task["id"]
+        if self.by_id.get(task_id) == row:
+            del self.by_id[task_id]
+            if task_id in self.duplicate_ids:
+                others = [other for other, t in self.rows.items() if t["id"] == task_id and other != row]
+                if others:
+                    self.by_id[task_id] = others[0]
+                if len(others) < 2:
+                    self.duplicate_ids.discard(task_id)
+        (self.completed_rows if task["completed"] else self.active_rows).discard(row)
+        due = self.by_due[task.get("due_date", "")]
+        due.discard(row)
+        if not due:
+            del self.by_due[task.get("due_date", "")]
+
+    def _select(self, rows):
+        return [self.rows[row] for row in sorted(rows)]
+
+    def all(self):
+        """Semua tugas, urut sesuai waktu ditambahkan"""
+        return list(self.rows.values())
+
+    def count(self):
+        """Jumlah tugas"""
+        return len(self.rows)
+
+    def each(self, status=None):
+        """Iterasi tugas urut waktu tambah tanpa membuat daftar baru;
+        status None berarti semua tugas, atau "active" / "completed"."""
+        if status is None:
+            return iter(self.rows.values())
+        rows = self.completed_rows if status == "completed" else self.active_rows
+        return (task for row, task in self.rows.items() if row in rows)
+
+    def due_dates(self):
+        """(id, due_date) tugas aktif yang punya batas waktu, tanpa membuat dict tugas.
+
+        Untuk id ganda hanya tugas yang dikembalikan get(id) yang ikut.
+        """
+        for due, rows in self.by_due.items():
+            if not due:
+                continue
+            for row in rows:
+                if row in self.active_rows:
+                    task_id = self.rows[row]["id"]
+                    if self.by_id[task_id] == row:
+                        yield task_id, due
+
+    def memory_usage(self):
+        """Perkiraan byte memori yang dipakai tugas-tugas beserta indeksnya"""
+        return deep_size([self.rows, self.by_id, self.duplicate_ids, self.active_rows,
+                          self.completed_rows, self.by_due])
+
+    def bytes_per_task(self):
+        """memory_usage() dibagi jumlah tugas"""
+        return self.memory_usage() / max(self.count(), 1)
+
+    def active(self):
+        """Tugas yang belum selesai"""
+        return self._select(self.active_rows)
+
+    def completed(self):
+        """Tugas yang sudah selesai"""
+        return self._select(self.completed_rows)
+
+    def due_on(self, due_date):
+        """Tugas dengan batas waktu tertentu"""
+        return self._select(self.by_due.get(due_date, ()))
+
+    def page(self, offset, limit, status=None):
+        """Satu halaman tugas urut waktu tambah, beserta jumlah semua yang cocok.
+
+        status None berarti semua tugas, atau "active" / "completed".
+        """
+        if status is None:
+            tasks = self.rows.values()
+            total = len(self.rows)
+        else:
+            tasks = self.each(status)
+            total = len(self.completed_rows if status == "completed" else self.active_rows)
+        return list(islice(tasks, offset, offset + limit)), total
+
+    def allocate_id(self):
+        """Berikan id baru yang belum pernah dipakai.
+
+        Agar proses lain tidak memberikan id yang sama, panggil di dalam
+        locked() bersama add() untuk tugas itu.
+        """
+        with self.locked():
+            task_id = self.next_id
+            self.next_id += 1
+        return task_id
+
+    def get(self, task_id):
+        """Cari tugas berdasarkan id"""
+        row = self.by_id.get(task_id)
+        return None if row is None else self.rows[row]
+
+    def add(self, task):
+        """Tambah tugas"""
+        with self.locked():
+            self._insert(task)
+            if self.undo is not None:
+                self.undo.append(("add", self.last_row, task, None))
+            self._added(task)
+
+    def update(self, task_id, fields):
+        """Ubah kolom tugas; kembalikan tugasnya atau None"""
+        with self.locked():
+            row = self.by_id.get(task_id)
+            if row is None:
+                return None
+            task = self.rows[row]
+            if self.undo is not None:
+                self.undo.append(("update", row, task, dict(task)))
+            self._unindex_row(row, task)
+            task.update(fields)
+            self._index_row(row, task)
+            self._updated(task_id, task, fields)
+            return task
+
+    def delete(self, task_id):
+        """Hapus tugas; kembalikan tugasnya atau None"""
+        with self.locked():
+            row = self.by_id.get(task_id)
+            if row is None:
+                return None
+            task = self.rows[row]
+            if self.undo is not None:
+                self.undo.append(("delete", row, task, None))
+            self._unindex_row(row, task)
+            del self.rows[row]
+            self._deleted(task)
+            return task
+
+    def flush(self):
+        """Tunggu penulisan di latar belakang, agar file tidak berubah sendiri sesudahnya"""
+
+    def close(self):
+        """Selesaikan semua penulisan yang tertunda"""
+
+    def _added(self, task):
+        if self.undo is None:
+            self._write()
+
+    def _updated(self, task_id, task, fields):
+        if self.undo is None:
+            self._write()
+
+    def _deleted(self, task):
+        if self.undo is None:
+            self._write()
+
+class JsonStore(MemoryStore):
+    """Satu file JSON yang ditulis ulang setiap ada perubahan.
+
+    seq di awal file naik setiap kali file ditulis, sehingga perubahan
+    oleh proses lain tetap dikenali walaupun ukuran dan waktu ubahnya sama.
+    """
+
+    def __init__(self, filename="tasks.json"):
+        super().__init__(filename)
+        self.seq = 0
+        self.seen_seq = None
+
+    def load(self):
+        self.seen = None  # Paksa baca ulang
+        self.refresh()
+        return self.all()
+
+    def _reload(self):
+        snapshot = read_snapshot(self.filename)
+        self._index(snapshot["tasks"], snapshot["next_id"])
+        self.seq = snapshot["seq"]
+        self.seen = fingerprint(self.files())
+        self.seen_seq = read_seq(self.filename)
+
+    def files(self):
+        return [self.filename]
+
+    def _changed(self):
+        return super()._changed() or read_seq(self.filename) != self.seen_seq
+
+    def _write(self):
+        with self.locked():
+            self.seq += 1
+            snapshot = {"seq": self.seq, "next_id": self.next_id, "tasks": self.all()}
+            write_atomic(self.filename, json.dumps(snapshot, indent=2, ensure_ascii=False))
+            self.seen = fingerprint(self.files())
+            self.seen_seq = self.seq
+
+class JournalStore(MemoryStore):
+    """Snapshot ditambah log perubahan yang hanya ditambahi.
+
+    fsync menentukan kapan log dipaksa ke disk: "always" setiap perubahan,
+    "interval" paling lama fsync_interval detik setelah perubahan (timer
+    menyusulkan fsync bila tidak ada perubahan berikutnya), "never"
+    diserahkan ke sistem operasi.  Setelah compact_every catatan, log dipadatkan ke
+    snapshot di thread latar belakang.  Pemadatan membaca dan menulis
+    snapshot baru tanpa kunci, lalu dengan kunci memastikan file tidak
+    berubah sementara itu sebelum menggantinya; bila berubah, diulang.
+    """
+
+    def __init__(self, filename="tasks.json", fsync="interval", fsync_interval=1.0, compact_every=10000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync harus salah satu dari {FSYNC_POLICIES}")
+        super().__init__(filename)
+        self.log_filename = filename + ".log"
+        self.old_log_filename = filename + ".log.1"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.log = None
+        self.seq = 0
+        self.records = 0  # Catatan di log sejak pemadatan terakhir
+        self.last_fsync = time.monotonic()
+        self.fsync_timer = None
+        self.fsync_lock = threading.Lock()  # Timer tidak boleh fsync log yang sedang ditutup
+        self.compactor = None
+        self.compact_lock = threading.Lock()
+        self.pending = []  # Catatan batch yang belum ditulis
+
+    def load(self):
+        """Muat snapshot lalu putar ulang log, termasuk log yang belum selesai dipadatkan"""
+        self.close()
+        self.seen = None  # Paksa baca ulang
+        self.refresh()
+        return self.all()
+
+    def _reload(self):
+        if self.log is not None:
+            self._close_log()
+        snapshot = apply_records(read_snapshot(self.filename), read_log(self.old_log_filename))
+        records = read_log(self.log_filename, truncate=True)
+        snapshot = apply_records(snapshot, records)
+        self._index(snapshot["tasks"], snapshot["next_id"])
+        self.seq = snapshot["seq"]
+        self.records = len(records)
+        # Log dibuka ulang, karena proses lain mungkin sudah memindahkannya ke log.1
+        self.log = open(self.log_filename, 'ab')
+        self.seen = fingerprint(self.files())
+        if os.path.exists(self.old_log_filename):
+            self.compact()
+
+    def files(self):
+        return [self.filename, self.old_log_filename, self.log_filename]
+
+    def _write(self):
+        """Tulis snapshot lengkap sekarang juga dan kosongkan log.
+
+        Pemadatan log.1 yang masih berjalan tidak perlu ditunggu: snapshot
+        ini sudah memuat semua catatannya, jadi pemadatan itu tidak
+        menambahkan apa-apa lagi.
+        """
+        with self.locked():
+            os.replace(write_temp_snapshot(self.filename, self.seq, self.next_id, self.each()), self.filename)
+            if self.log is not None:
+                self.log.truncate(0)
+            self.records = 0
+            self.seen = fingerprint(self.files())
+
+    def _append(self, record):
+        self.seq += 1
+        record["seq"] = self.seq
+        self.log.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+        self.log.flush()
+        if self.fsync == "always" or (self.fsync == "interval" and
+                                      time.monotonic() - self.last_fsync >= self.fsync_interval):
+            os.fsync(self.log.fileno())
+            self.last_fsync = time.monotonic()
+        elif self.fsync == "interval":
+            self._schedule_fsync()
+        self.records += 1
+        if self.records >= self.compact_every:
+            self.compact()
+        self.seen = fingerprint(self.files())
+
+    def _record(self, record):
+        if self.undo is None:
+            self._append(record)
+        else:
+            self.pending.append(record)
+
+    def _added(self, task):
+        self._record({"op": "add", "task": dict(task)})
+
+    def _updated(self, task_id, task, fields):
+        self._record({"op": "update", "id": task_id, "fields": fields})
+
+    def _deleted(self, task):
+        self._record({"op": "delete", "id": task["id"]})
+
+    def _commit(self):
+        """Tulis seluruh batch sebagai satu baris log"""
+        records, self.pending = self.pending, []
+        if records:
+            self._append({"op": "batch", "records": records})
+
+    def _rollback(self):
+        self.pending = []
+        super()._rollback()
+
+    def compact(self):
+        """Pindahkan log saat ini ke log.1 dan padatkan di latar belakang"""
+        with self.compact_lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return
+            if os.path.exists(self.old_log_filename):
+                self._start_compaction()
+                return
+            os.fsync(self.log.fileno())
+            self._close_log()
+            os.replace(self.log_filename, self.old_log_filename)
+            self.log = open(self.log_filename, 'ab')
+            self.records = 0
+            self._start_compaction()
+
+    def _schedule_fsync(self):
+        """Pastikan log di-fsync saat fsync_interval habis, walau tidak ada perubahan lagi"""
+        if self.fsync_timer is not None and self.fsync_timer.is_alive():
+            return
+        delay = max(0.0, self.fsync_interval - (time.monotonic() - self.last_fsync))
+        self.fsync_timer = threading.Timer(delay, self._fsync_later)
+        self.fsync_timer.daemon = True
+        self.fsync_timer.start()
+
+    def _fsync_later(self):
+        with self.fsync_lock:
+            if self.log is not None:
+                os.fsync(self.log.fileno())
+                self.last_fsync = time.monotonic()
+
+    def _close_log(self):
+        with self.fsync_lock:
+            self.log.close()
+            self.log = None
+
+    def _start_compaction(self):
+        self.compactor = threading.Thread(target=self._compact, name="todo-compact")
+        self.compactor.start()
+
+    def _compact(self):
+        """Gabungkan snapshot dan log.1 menjadi snapshot baru (di thread latar)"""
+        inputs = [self.filename, self.old_log_filename]
+        while True:
+            before = fingerprint(inputs)
+            if not os.path.exists(self.old_log_filename):
+                return
+            tmp = self._merge_old_log()
+            handle = acquire_lock(self.filename + ".lock")
+            try:
+                if fingerprint(inputs) == before:
+                    unchanged = fingerprint(self.files()) == self.seen
+                    os.replace(tmp, self.filename)
+                    os.remove(self.old_log_filename)
+                    if unchanged:
+                        self.seen = fingerprint(self.files())
+                    return
+            finally:
+                handle.close()
+            os.remove(tmp)
+
+    def _merge_old_log(self):
+        """Tulis snapshot ditambah log.1 ke file sementara; kembalikan namanya"""
+        snapshot = apply_records(read_snapshot(self.filename), read_log(self.old_log_filename))
+        return write_temp_snapshot(self.filename, snapshot["seq"], snapshot["next_id"], snapshot["tasks"])
+
+    def _wait_for_compaction(self):
+        if self.compactor is not None:
+            self.compactor.join()
+            self.compactor = None
+
+    def flush(self):
+        self._wait_for_compaction()
+
+    def close(self):
+        """Paksa log ke disk dan tunggu pemadatan yang sedang berjalan"""
+        self._wait_for_compaction()
+        if self.fsync_timer is not None:
+            self.fsync_timer.cancel()
+            self.fsync_timer = None
+        if self.log is not None:
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self._close_log()
+
+COLUMNS = ("id", "title", "description", "due_date", "completed", "created_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    due_date TEXT NOT NULL DEFAULT '',
+    completed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_id ON tasks (id);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed, seq);
+CREATE INDEX IF NOT EXISTS tasks_due_date ON tasks (due_date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+SELECT = "SELECT id, title, description, due_date, completed, created_at FROM tasks"
+INSERT = ("INSERT INTO tasks (id, title, description, due_date, completed, created_at) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+FIRST_WITH_ID = "(SELECT seq FROM tasks WHERE id = ? ORDER BY seq LIMIT 1)"
+
+def _row_to_task(row):
+    task = dict(zip(COLUMNS, row))
+    task["completed"] = bool(task["completed"])
+    return task
+
+def _task_to_row(task):
+    return (task["id"], task["title"], task.get("description", ""), task.get("due_date", ""),
+            int(task.get("completed", False)), task.get("created_at"))
+
+class SqliteStore:
+    """Tugas di database SQLite; hanya tugas yang diminta yang dibaca.
+
+    Kolom seq menjaga urutan tambah, id diindeks tetapi tidak unik, sehingga
+    data lama dengan id ganda tetap utuh dan perubahan mengenai tugas
+    pertama dengan id itu.  Query memakai parameter, jadi sqlite3 dapat
+    memakai ulang statement yang sudah disiapkan dari cache-nya.
+
+    Perubahan yang terdiri dari beberapa query berjalan dalam transaksi
+    BEGIN IMMEDIATE, yang sekaligus menjadi kunci antarproses; perubahan
+    dari koneksi lain dikenali lewat PRAGMA data_version.
+    """
+
+    def __init__(self, filename="tasks.db", import_from=None):
+        self.filename = filename
+        self.import_from = import_from
+        self.db = None
+        self.lock_depth = 0
+        self.thread_lock = threading.RLock()  # Koneksi dipakai bersama thread pengingat
+        self.data_version = None
+        self.generation = 0
+
+    def load(self):
+        """Buka database dan impor file JSON lama bila database masih baru"""
+        self.close()
+        is_new = not os.path.exists(self.filename)
+        self.db = sqlite3.connect(self.filename, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA busy_timeout=10000")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        if is_new and self.import_from and os.path.exists(self.import_from):
+            self._import(self.import_from)
+        self.data_version = self._data_version()
+        return None
+
+    def _data_version(self):
+        return self.db.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Catat perubahan oleh koneksi lain; query selalu membaca data terbaru"""
+        version = self._data_version()
+        if version != self.data_version:
+            self.data_version = version
+            self.generation += 1
+
+    def lock(self):
+        self.thread_lock.acquire()
+        if self.lock_depth == 0:
+            try:
+                self.db.execute("BEGIN IMMEDIATE")
+            except BaseException:
+                self.thread_lock.release()
+                raise
+        self.lock_depth += 1
+
+    def unlock(self, commit=True):
+        try:
+            self.lock_depth -= 1
+            if self.lock_depth == 0:
+                if not commit:
+                    self.db.execute("ROLLBACK")
+                    return
+                try:
+                    self.db.execute("COMMIT")
+                except BaseException:
+                    # COMMIT yang gagal (misalnya disk penuh) membiarkan transaksi terbuka
+                    if self.db.in_transaction:
+                        self.db.execute("ROLLBACK")
+                    raise
+        finally:
+            self.thread_lock.release()
+
+    @contextmanager
+    def locked(self):
+        self.lock()
+        try:
+            yield
+        except BaseException:
+            self.unlock(commit=False)
+            raise
+        self.unlock()
+
+    def _import(self, filename):
+        """Impor snapshot JSON beserta log-lognya dalam satu transaksi.
+
+        Snapshot dibaca bertahap langsung ke tabel, jadi file sebesar apa
+        pun tidak pernah dimuat seluruhnya ke memori.
+        """
+        header = {}
+        records = read_log(filename + ".log.1") + read_log(filename + ".log")
+        with self.locked():
+            # Proses lain yang membuka database baru ini bersamaan mungkin sudah mengimpornya
+            if self.db.execute("SELECT 1 FROM meta WHERE key = 'next_id'").fetchone():
+                return
+            self.db.executemany(INSERT, map(_task_to_row, stream_snapshot(filename, header)))
+            replay(self, records, header.get("seq", 0))
+            added = [change["task"]["id"] for record in records for change in changes(record)
+                     if change["op"] == "add"]
+            self._set_next_id(max([header.get("next_id", 1)] + [task_id + 1 for task_id in added]))
+
+    def files(self):
+        return [self.filename, self.filename + "-wal"]
+
+    def _set_next_id(self, next_id):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (next_id,))
+
+    def allocate_id(self):
+        """Berikan id baru yang belum pernah dipakai"""
+        with self.locked():
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+            max_id = self.db.execute("SELECT MAX(id) FROM tasks").fetchone()[0] or 0
+            task_id = max(row[0] if row else 1, max_id + 1)
+            self._set_next_id(task_id + 1)
+        return task_id
+
+    def begin(self):
+        """Mulai batch: semua perubahan berikutnya masuk satu transaksi"""
+        self.lock()
+
+    def commit(self):
+        self.unlock()
+
+    def rollback(self):
+        self.unlock(commit=False)
+
+    def save(self, tasks):
+        """Ganti semua tugas dalam satu transaksi"""
+        with self.locked():
+            self.db.execute("DELETE FROM tasks")
+            self.db.executemany(INSERT, map(_task_to_row, tasks))
+
+    def all(self):
+        return [_row_to_task(row) for row in self.db.execute(SELECT + " ORDER BY seq")]
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def each(self, status=None):
+        where, params = "", ()
+        if status is not None:
+            where, params = " WHERE completed = ?", (int(status == "completed"),)
+        return map(_row_to_task, self.db.execute(SELECT + where + " ORDER BY seq", params))
+
+    def due_dates(self):
+        return self.db.execute("SELECT id, due_date FROM tasks AS t WHERE completed = 0 AND due_date != '' "
+                               "AND seq = (SELECT MIN(seq) FROM tasks WHERE id = t.id)")
+
+    def active(self):
+        return [_row_to_task(row) for row in self.db.execute(SELECT + " WHERE completed = 0 ORDER BY seq")]
+
+    def completed(self):
+        return [_row_to_task(row) for row in self.db.execute(SELECT + " WHERE completed = 1 ORDER BY seq")]
+
+    def due_on(self, due_date):
+        return [_row_to_task(row) for row in self.db.execute(SELECT + " WHERE due_date = ? ORDER BY seq", (due_date,))]
+
+    def page(self, offset, limit, status=None):
+        where, params = "", ()
+        if status is not None:
+            where, params = " WHERE completed = ?", (int(status == "completed"),)
+        total = self.db.execute("SELECT COUNT(*) FROM tasks" + where, params).fetchone()[0]
+        rows = self.db.execute(SELECT + where + " ORDER BY seq LIMIT ? OFFSET ?", params + (limit, offset))
+        return [_row_to_task(row) for row in rows], total
+
+    def get(self, task_id):
+        row = self.db.execute(SELECT + " WHERE seq = " + FIRST_WITH_ID, (task_id,)).fetchone()
+        return None if row is None else _row_to_task(row)
+
+    def add(self, task):
+        self.db.execute(INSERT, _task_to_row(task))
+
+    def update(self, task_id, fields):
+        with self.locked():
+            task = self.get(task_id)
+            if task is None:
+                return None
+            fields = {key: value for key, value in fields.items() if key in COLUMNS}
+            if fields:
+                assignments = ", ".join(f"{key} = ?" for key in sorted(fields))
+                values = [int(fields[key]) if key == "completed" else fields[key] for key in sorted(fields)]
+                self.db.execute(f"UPDATE tasks SET {assignments} WHERE seq = {FIRST_WITH_ID}", values + [task_id])
+                task.update(fields)
+            return task
+
+    def delete(self, task_id):
+        with self.locked():
+            task = self.get(task_id)
+            if task is not None:
+                self.db.execute("DELETE FROM tasks WHERE seq = " + FIRST_WITH_ID, (task_id,))
+            return task
+
+    def flush(self):
+        """Pindahkan isi WAL ke database, agar close() tidak mengubah file lagi"""
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None